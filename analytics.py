@@ -0,0 +1,186 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import bindparam, case, delete, event, func, insert, inspect, select, text, union_all
+
+from models import (db, Job, Application, ArchivedJob, ArchivedApplication, JobStats,
+                    CompanyDailyApplications)
+
+# ==================== تحديث العدادات مع كل تغيير ====================
+
+# عمود العداد لكل حالة طلب؛ الحالات الأخرى تُحسب في الإجمالي فقط
+STATUS_COLUMNS = {'Pending': 'pending', 'Accepted': 'accepted', 'Rejected': 'rejected'}
+
+_UPSERT_JOB = text(
+    "INSERT INTO job_stats (job_id, company_id, applications, pending, accepted, rejected) "
+    "VALUES (:job_id, :company_id, :applications, :pending, :accepted, :rejected) "
+    "ON CONFLICT (job_id) DO UPDATE SET "
+    "applications = job_stats.applications + :applications, "
+    "pending = job_stats.pending + :pending, "
+    "accepted = job_stats.accepted + :accepted, "
+    "rejected = job_stats.rejected + :rejected"
+)
+
+_UPSERT_DAY = text(
+    "INSERT INTO company_daily_applications (company_id, day, applications) "
+    "VALUES (:company_id, :day, :applications) "
+    "ON CONFLICT (company_id, day) DO UPDATE SET "
+    "applications = company_daily_applications.applications + :applications"
+).bindparams(bindparam('day', type_=db.Date))
+
+
+class _Deltas:
+    """تجميع التغييرات في الذاكرة ثم كتابتها بعبارة واحدة لكل جدول"""
+
+    def __init__(self):
+        self.jobs = defaultdict(Counter)
+        self.days = Counter()
+        self.recount = set()
+
+    def application(self, job_id, status, applied_at, sign):
+        self.jobs[job_id]['applications'] += sign
+        self.status(job_id, status, sign)
+        self.days[job_id, (applied_at or datetime.utcnow()).date()] += sign
+
+    def status(self, job_id, status, sign):
+        column = STATUS_COLUMNS.get(status)
+        if column:
+            self.jobs[job_id][column] += sign
+
+    def apply(self, conn):
+        if self.recount:
+            recount_jobs(conn, self.recount)
+        job_ids = set(self.jobs) | {job_id for job_id, _ in self.days}
+        if not job_ids:
+            return
+        companies = dict(conn.execute(
+            select(Job.job_id, Job.company_id).where(Job.job_id.in_(job_ids))
+        ).all())
+
+        job_rows = [
+            {'job_id': job_id, 'company_id': companies[job_id], 'applications': counts['applications'],
+             **{column: counts[column] for column in STATUS_COLUMNS.values()}}
+            for job_id, counts in self.jobs.items()
+            if job_id in companies and job_id not in self.recount and any(counts.values())
+        ]
+        day_rows = Counter()
+        for (job_id, day), count in self.days.items():
+            if job_id in companies:
+                day_rows[companies[job_id], day] += count
+        day_rows = [
+            {'company_id': company_id, 'day': day, 'applications': count}
+            for (company_id, day), count in day_rows.items() if count
+        ]
+        if job_rows:
+            conn.execute(_UPSERT_JOB, job_rows)
+        if day_rows:
+            conn.execute(_UPSERT_DAY, day_rows)
+
+
+def count_new_applications(conn, rows):
+    """إضافة طلبات أُدرجت بعبارات مجمعة إلى العدادات؛ rows قواميس فيها job_id و status و applied_at"""
+    deltas = _Deltas()
+    for row in rows:
+        deltas.application(row['job_id'], row['status'], row['applied_at'], 1)
+    deltas.apply(conn)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_application_counts(session, flush_context):
+    """تحديث العدادات في نفس معاملة التقديم أو تغيير الحالة"""
+    deltas = _Deltas()
+    for application in session.new:
+        if isinstance(application, Application):
+            deltas.application(application.job_id, application.status, application.applied_at, 1)
+    for application in session.deleted:
+        if isinstance(application, Application):
+            deltas.application(application.job_id, application.status, application.applied_at, -1)
+    for application in session.dirty:
+        if not isinstance(application, Application):
+            continue
+        history = inspect(application).attrs.status.history
+        if not history.has_changes():
+            continue
+        if history.deleted:
+            deltas.status(application.job_id, history.deleted[0], -1)
+            deltas.status(application.job_id, application.status, 1)
+        else:
+            # الحالة السابقة لم تكن محمّلة: إعادة عدّ طلبات هذه الوظيفة فقط
+            deltas.recount.add(application.job_id)
+    if deltas.jobs or deltas.recount:
+        deltas.apply(session.connection())
+
+
+# ==================== إعادة البناء ====================
+
+def _job_counts(applications, jobs):
+    return (
+        select(applications.job_id, jobs.company_id, func.count(),
+               *(func.sum(case((applications.status == status, 1), else_=0)) for status in STATUS_COLUMNS))
+        .join(jobs, jobs.job_id == applications.job_id)
+        .group_by(applications.job_id, jobs.company_id)
+    )
+
+
+_JOB_STATS_COLUMNS = ['job_id', 'company_id', 'applications', *STATUS_COLUMNS.values()]
+
+
+def recount_jobs(conn, job_ids):
+    """إعادة حساب عدادات وظائف محددة من جدول الطلبات (بعد الاستعادة من الأرشيف مثلاً)"""
+    job_ids = list(job_ids)
+    conn.execute(delete(JobStats).where(JobStats.job_id.in_(job_ids)))
+    conn.execute(insert(JobStats).from_select(
+        _JOB_STATS_COLUMNS, _job_counts(Application, Job).where(Application.job_id.in_(job_ids))
+    ))
+
+
+def forget_jobs(conn, job_ids):
+    """حذف عدادات وظائف نُقلت إلى الأرشيف؛ الطلبات اليومية تبقى لأنها سجل تاريخي"""
+    conn.execute(delete(JobStats).where(JobStats.job_id.in_(list(job_ids))))
+
+
+def rebuild_rollups(conn):
+    """إعادة بناء كل العدادات من الطلبات الحية والمؤرشفة (للإصلاح أو بعد تحميل مجمع)
+
+    تمر على كل الطلبات، فالأفضل تشغيلها في وقت قليل الكتابة.
+    """
+    conn.execute(delete(JobStats))
+    conn.execute(insert(JobStats).from_select(_JOB_STATS_COLUMNS, _job_counts(Application, Job)))
+
+    applied = union_all(
+        select(Job.company_id, func.date(Application.applied_at).label('day'))
+        .join(Job, Job.job_id == Application.job_id),
+        select(ArchivedJob.company_id, func.date(ArchivedApplication.applied_at).label('day'))
+        .join(ArchivedJob, ArchivedJob.job_id == ArchivedApplication.job_id),
+    ).subquery()
+    conn.execute(delete(CompanyDailyApplications))
+    conn.execute(insert(CompanyDailyApplications).from_select(
+        ['company_id', 'day', 'applications'],
+        select(applied.c.company_id, applied.c.day, func.count())
+        .group_by(applied.c.company_id, applied.c.day),
+    ))
+
+
+# ==================== قراءة لوحة الشركة ====================
+
+def company_job_stats(company_id):
+    """{job_id: JobStats} لوظائف الشركة التي عليها طلبات؛ صف لكل وظيفة"""
+    return {
+        stats.job_id: stats
+        for stats in db.session.execute(select(JobStats).where(JobStats.company_id == company_id)).scalars()
+    }
+
+
+def daily_applications(company_id, days=30):
+    """[(اليوم، عدد الطلبات)] لآخر days يوماً، والأيام بلا طلبات بصفر"""
+    today = datetime.utcnow().date()
+    first = today - timedelta(days=days - 1)
+    counts = {
+        (day if isinstance(day, date) else date.fromisoformat(day)): count
+        for day, count in db.session.execute(
+            select(CompanyDailyApplications.day, CompanyDailyApplications.applications)
+            .where(CompanyDailyApplications.company_id == company_id, CompanyDailyApplications.day >= first)
+        )
+    }
+    return [(first + timedelta(days=offset), counts.get(first + timedelta(days=offset), 0))
+            for offset in range(days)]
@@ -1,7 +1,7 @@
 // ==================== تسجيل Service Worker ====================
 if ('serviceWorker' in navigator) {
     window.addEventListener('load', () => {
-        navigator.serviceWorker.register('/static/js/service-worker.js')
+        navigator.serviceWorker.register('/service-worker.js')
             .then(registration => {
                 console.log('ServiceWorker تم تسجيله بنجاح');
             })
@@ -78,16 +78,18 @@ function showAlert(message, type = 'info') {
 
 // ==================== البحث عن الوظائف ====================
 function searchJobs() {
+    const keyword = document.getElementById('keyword-filter')?.value.trim() || '';
     const city = document.getElementById('city-filter')?.value || '';
     const category = document.getElementById('category-filter')?.value || '';
     const jobType = document.getElementById('type-filter')?.value || '';
     
-    let url = '/search?';
-    if (city) url += `city=${city}&`;
-    if (category) url += `category=${category}&`;
-    if (jobType) url += `job_type=${jobType}`;
+    const params = new URLSearchParams();
+    if (keyword) params.set('q', keyword);
+    if (city) params.set('city', city);
+    if (category) params.set('category', category);
+    if (jobType) params.set('job_type', jobType);
     
-    window.location.href = url;
+    window.location.href = `/search?${params.toString()}`;
 }
 
 // ==================== تحديث حالة الطلب ====================
@@ -119,6 +121,36 @@ function updateApplicationStatus(appId, status) {
     });
 }
 
+// ==================== استيراد الوظائف من ملف ====================
+function importJobs(form) {
+    const report = document.getElementById('import-errors');
+    report.innerHTML = '';
+
+    fetch(form.action, {
+        method: 'POST',
+        body: new FormData(form)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.imported) {
+            showAlert(data.message, data.failed ? 'warning' : 'success');
+        } else {
+            showAlert(data.message || 'لم يتم استيراد أي وظيفة', 'error');
+        }
+        (data.errors || []).forEach(item => {
+            const line = document.createElement('li');
+            const fields = Object.entries(item.errors).map(([field, message]) => `${field}: ${message}`);
+            line.textContent = `الصف ${item.row} — ${fields.join('، ')}`;
+            report.appendChild(line);
+        });
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showAlert('خطأ في الاتصال بالخادم', 'error');
+    });
+    return false;
+}
+
 // ==================== تحديث حالة الشركة ====================
 function updateCompanyStatus(companyId, status) {
     fetch(`/admin/company/${companyId}/status`, {
@@ -155,6 +187,131 @@ function updateJobStatus(jobId, status) {
     });
 }
 
+// ==================== الإشراف الجماعي ====================
+function toggleSelection(kind, checked) {
+    document.querySelectorAll(`.select-${kind}`).forEach(box => box.checked = checked);
+}
+
+function batchUpdateStatus(kind, status, fromStatus = null) {
+    const ids = Array.from(document.querySelectorAll(`.select-${kind}:checked`)).map(box => Number(box.value));
+    if (!fromStatus && ids.length === 0) {
+        showAlert('يرجى تحديد عنصر واحد على الأقل', 'warning');
+        return;
+    }
+    if (fromStatus && !confirm('سيتم تطبيق الإجراء على كل العناصر المعلقة. هل أنت متأكد؟')) return;
+
+    fetch(`/admin/${kind}/status`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(fromStatus ? { status, from_status: fromStatus } : { ids, status })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            let message = `تم تحديث ${data.updated} عنصر بنجاح ✨`;
+            if (data.not_found.length) message += ` (غير موجود: ${data.not_found.join('، ')})`;
+            showAlert(message, data.not_found.length ? 'warning' : 'success');
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showAlert(data.message || 'حدث خطأ أثناء تحديث الحالة', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showAlert('خطأ في الاتصال بالخادم', 'error');
+    });
+}
+
+// ==================== أرشيف الوظائف ====================
+function restoreArchivedJob(jobId) {
+    if (!confirm('ستعود الوظيفة وكل طلباتها إلى الجداول الحية بنفس حالتها. هل أنت متأكد؟')) return;
+
+    fetch(`/admin/archive/${jobId}/restore`, { method: 'POST' })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showAlert(`تمت استعادة الوظيفة و ${data.applications} طلب ✨`, 'success');
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showAlert(data.message || 'حدث خطأ أثناء الاستعادة', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showAlert('خطأ في الاتصال بالخادم', 'error');
+    });
+}
+
+// ==================== الإشعارات الفورية (SSE) ====================
+const APPLICATION_STATUS_LABELS = {
+    Pending: 'قيد المراجعة',
+    Accepted: 'مقبول',
+    Rejected: 'مرفوض',
+};
+
+function subscribeEvents(container) {
+    let lastEventId = container.dataset.lastEventId || '';
+    let source = null;
+
+    function connect() {
+        source = new EventSource(`${container.dataset.eventsStream}?last_event_id=${lastEventId}`);
+
+        source.addEventListener('application_status', event => {
+            lastEventId = event.lastEventId;
+            applyApplicationStatus(JSON.parse(event.data));
+        });
+        source.addEventListener('new_application', event => {
+            lastEventId = event.lastEventId;
+            applyNewApplication(JSON.parse(event.data));
+        });
+
+        // المتصفح يعيد الاتصال وحده بعد انقطاع عادي؛ أما الرفض (مثل 503 عند امتلاء العامل) فيغلق المصدر
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                setTimeout(connect, 5000 + Math.random() * 10000);
+            }
+        };
+    }
+
+    connect();
+    window.addEventListener('pagehide', () => source && source.close());
+}
+
+function applyApplicationStatus(data) {
+    const row = document.querySelector(`[data-application-id="${data.application_id}"]`);
+    if (!row || row.dataset.status === data.status) return;
+
+    row.dataset.status = data.status;
+    const badge = row.querySelector('.job-status');
+    badge.className = `job-status status-${data.status.toLowerCase()}`;
+    badge.textContent = APPLICATION_STATUS_LABELS[data.status] || data.status;
+
+    Object.keys(APPLICATION_STATUS_LABELS).forEach(status => {
+        const stat = document.querySelector(`[data-stat="${status}"]`);
+        if (stat) stat.textContent = document.querySelectorAll(`[data-application-id][data-status="${status}"]`).length;
+    });
+    const title = row.querySelector('td').textContent;
+    showAlert(`تم تحديث حالة طلبك على "${title}": ${badge.textContent}`, data.status === 'Rejected' ? 'warning' : 'success');
+}
+
+function applyNewApplication(data) {
+    const row = document.querySelector(`[data-job-id="${data.job_id}"]`);
+    if (row) {
+        const count = row.querySelector('[data-applications]');
+        count.textContent = Number(count.textContent) + 1;
+    }
+    const total = document.querySelector('[data-stat="applications"]');
+    if (total) total.textContent = Number(total.textContent) + 1;
+    showAlert(row ? `طلب جديد على "${row.querySelector('td').textContent}" ✨` : 'وصل طلب جديد ✨', 'success');
+}
+
+const eventsContainer = document.querySelector('[data-events-stream]');
+if (eventsContainer && window.EventSource) {
+    subscribeEvents(eventsContainer);
+}
+
 // ==================== تأثيرات الأزرار ====================
 document.querySelectorAll('.btn').forEach(button => {
     button.addEventListener('mousedown', function() {
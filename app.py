@@ -1,64 +1,326 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_file
-from models import db, Admin, Company, Job, JobSeeker, Application
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Blueprint, Response, current_app, make_response, render_template, request, redirect, url_for, session, jsonify, send_file, stream_with_context
+from models import db, Admin, Company, Job, JobSeeker, Application, CvText, ArchivedJob, ArchivedApplication
+from database import init_engines, read_replica
+from search import rebuild_search_index, ranked_matches, ranked_cv_matches
+from migrations import upgrade, check_query_plans
+from query_budget import check_query_budget
+from pagination import keyset_paginate
+from cache import PUBLISHED_JOBS, bump_version, get_version, published_facets
+from instrumentation import init_instrumentation
+from page_cache import init_page_cache, cached_page
+from assets import init_assets, build_assets, service_worker_source
+from recommendations import init_recommendations, recommend_jobs
+from events import COMPANY, SEEKER, init_events, event_stream, latest_event_id, prune_events
+from notifications import (CLAIM_BATCH_SIZE, enqueue_company_status, enqueue_job_status, prune_notifications,
+                           run_worker as run_notifications_worker)
+from exports import applicants_query, stream_applicants_csv
+from cv_text import run_workers
+from synthetic import generate as generate_synthetic_data
+from job_import import ImportFormatError, read_rows, import_jobs
+from analytics import company_job_stats, daily_applications, rebuild_rollups
+from archive import ARCHIVE_BATCH_SIZE, archive_jobs, restore_job, table_sizes
+from storage import save_cv, blob_path, is_blob_name, collect_garbage, recount_references
+from passwords import HashingBusy, needs_rehash
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from sqlalchemy import func, case, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, joinedload, load_only
 import os
 from dotenv import load_dotenv
+import click
 
 # تحميل متغيرات البيئة
 load_dotenv()
 
-app = Flask(__name__)
-
-# إعدادات الأمان والقاعدة
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///recruitment.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+bp = Blueprint('main', __name__, cli_group=None)
 
 # إعدادات رفع الملفات
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+def load_config(app):
+    """قراءة الإعدادات من متغيرات البيئة"""
+    # إعدادات الأمان والقاعدة
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///recruitment.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # مجمع الاتصالات لقواعد الخادم (PostgreSQL/MySQL)؛ SQLite لا يستخدمه
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    # أقصى مدة لاستعلام واحد في PostgreSQL بالمللي ثانية (0 = بلا حد)
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    # SQLite: مدة انتظار القفل قبل الفشل، وحجم الملف المقروء عبر mmap بالبايت
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # نسخة مقروءة اختيارية لصفحات الزوار (الرئيسية والبحث والتفاصيل وواجهة JSON)
+    app.config['DATABASE_REPLICA_URL'] = os.getenv('DATABASE_REPLICA_URL', '')
+
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+    # تسليم ملفات السير الذاتية عبر الخادم الأمامي بعد التحقق من الصلاحية:
+    # CV_ACCEL_REDIRECT_PREFIX لمسار داخلي في nginx (X-Accel-Redirect)
+    # أو USE_X_SENDFILE لخوادم Apache/lighttpd (X-Sendfile)
+    app.config['CV_ACCEL_REDIRECT_PREFIX'] = os.getenv('CV_ACCEL_REDIRECT_PREFIX', '')
+    app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+    # تجزئة كلمات المرور: الخوارزمية والتكلفة بصيغة Werkzeug (مثل scrypt:32768:8:1 أو pbkdf2:sha256:600000)
+    # الهاشات القديمة تُرقّى تلقائياً عند أول دخول ناجح بعد تغيير الإعداد
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # أقصى عدد لعمليات التحقق المتزامنة في كل عملية، ومدة انتظار مكان في الطابور بالثواني
+    app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.getenv('PASSWORD_HASH_CONCURRENCY', os.cpu_count() or 1))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+    # ذاكرة صفحات الزوار: داخل العملية افتراضياً، أو Redis مشترك بين العمال عبر PAGE_CACHE_URL
+    app.config['PAGE_CACHE_URL'] = os.getenv('PAGE_CACHE_URL', '')
+    app.config['PAGE_CACHE_MAX_BYTES'] = int(os.getenv('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    app.config['PAGE_CACHE_TTL'] = int(os.getenv('PAGE_CACHE_TTL', 3600))
+
+    # المقاييس: METRICS_DIR مجلد مشترك بين عمال gunicorn حتى يجمع /metrics أرقام الجميع،
+    # METRICS_TOKEN يقصر /metrics على من يرسل Authorization: Bearer <token>،
+    # SLOW_REQUEST_MS يسجل الطلبات الأبطأ من هذه المدة مع استعلاماتها (0 = معطل)
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR', '')
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')
+    app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', 0))
+
+    # الوظائف المقترحة في لوحة الباحث: عددها، وكل كم ثانية يُتحقق من وجود وظائف منشورة جديدة
+    app.config['RECOMMENDATIONS_COUNT'] = int(os.getenv('RECOMMENDATIONS_COUNT', 6))
+    app.config['RECOMMENDATIONS_REFRESH_SECONDS'] = float(os.getenv('RECOMMENDATIONS_REFRESH_SECONDS', 30))
+
+    # أرشفة الوظائف بهذه الحالات بعد هذا العدد من الأيام من نشرها (flask archive-jobs)
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.getenv('ARCHIVE_AFTER_DAYS', 180))
+    app.config['ARCHIVE_STATUSES'] = [
+        status.strip() for status in os.getenv('ARCHIVE_STATUSES', 'Rejected,Hidden').split(',') if status.strip()
+    ]
+
+    # الإشعارات الفورية (SSE): كل اتصال يشغل خيطاً في العامل، فالحد لكل عملية أقل من عدد خيوطها
+    app.config['EVENTS_MAX_CONNECTIONS'] = int(os.getenv('EVENTS_MAX_CONNECTIONS', 4))
+    app.config['EVENTS_POLL_INTERVAL'] = float(os.getenv('EVENTS_POLL_INTERVAL', 1.0))
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    app.config['EVENTS_MAX_SECONDS'] = int(os.getenv('EVENTS_MAX_SECONDS', 300))
+    app.config['EVENTS_RETRY_SECONDS'] = int(os.getenv('EVENTS_RETRY_SECONDS', 5))
+    app.config['EVENTS_RETENTION_DAYS'] = int(os.getenv('EVENTS_RETENTION_DAYS', 7))
+
+    # إشعارات البريد: log يكتبها في السجل، smtp يرسلها، أو module:Class لمرسل مخصص
+    app.config['NOTIFICATION_SENDER'] = os.getenv('NOTIFICATION_SENDER', 'log')
+    app.config['SMTP_HOST'] = os.getenv('SMTP_HOST', 'localhost')
+    app.config['SMTP_PORT'] = int(os.getenv('SMTP_PORT', 1025))
+    app.config['SMTP_USERNAME'] = os.getenv('SMTP_USERNAME', '')
+    app.config['SMTP_PASSWORD'] = os.getenv('SMTP_PASSWORD', '')
+    app.config['SMTP_USE_TLS'] = os.getenv('SMTP_USE_TLS', '0') == '1'
+    app.config['SMTP_TIMEOUT'] = float(os.getenv('SMTP_TIMEOUT', 10))
+    app.config['MAIL_FROM'] = os.getenv('MAIL_FROM', 'no-reply@localhost')
+
+    # عدد الأيام في رسم الطلبات اليومية بلوحة الشركة
+    app.config['ANALYTICS_DAYS'] = int(os.getenv('ANALYTICS_DAYS', 30))
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-db.init_app(app)
 
-# إنشاء جداول قاعدة البيانات
-with app.app_context():
+def create_app(config=None):
+    """إنشاء التطبيق دون أي اتصال بقاعدة البيانات أو كتابة على القرص
+
+    المخطط لا يُنشأ عند التشغيل؛ شغّل flask db-upgrade مرة واحدة قبل تشغيل العمال.
+    """
+    app = Flask(__name__)
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    init_engines(app, db)
+    init_instrumentation(app)
+    init_assets(app)
+    init_page_cache(app)
+    init_recommendations(app)
+    init_events(app)
+    app.register_blueprint(bp)
+    return app
+
+
+@bp.cli.command('gc-cvs')
+@click.option('--grace', default=3600, help='تجاهل الملفات المعدلة خلال هذه المدة بالثواني')
+@click.option('--recount', is_flag=True, help='إعادة حساب عدد المراجع من جدول الطلبات أولاً')
+def gc_cvs_command(grace, recount):
+    """حذف ملفات السير الذاتية التي لا يشير إليها أي طلب"""
+    if recount:
+        recount_references()
+    removed = collect_garbage(current_app.config['UPLOAD_FOLDER'], grace_seconds=grace)
+    print(f"✓ تم حذف {removed} ملف")
+
+
+@bp.cli.command('cv-worker')
+@click.option('--processes', default=1, help='عدد عمليات الاستخراج المتوازية')
+@click.option('--poll-interval', default=2.0, help='الانتظار بالثواني عند فراغ الطابور')
+@click.option('--once', is_flag=True, help='الخروج عند فراغ الطابور')
+def cv_worker_command(processes, poll_interval, once):
+    """استخراج نصوص السير الذاتية في الخلفية"""
+    run_workers(current_app._get_current_object(), processes=processes, poll_interval=poll_interval, stop_when_idle=once)
+
+
+@bp.cli.command('db-upgrade')
+def db_upgrade_command():
+    """إنشاء الجداول الناقصة وتطبيق ترحيلات المخطط (مرة واحدة عند النشر، لا في كل عامل)"""
     db.create_all()
+    applied = upgrade(db.engine)
+    for version, description in applied:
+        print(f"✓ ترحيل {version}: {description}")
+    if not applied:
+        print("✓ قاعدة البيانات محدثة")
 
-# ==================== الصفحات العامة ====================
 
-@app.route('/')
-def index():
-    """الصفحة الرئيسية - عرض الوظائف المنشورة"""
-    page = request.args.get('page', 1, type=int)
-    jobs = Job.query.filter_by(status='Published').paginate(page=page, per_page=12)
-    
-    # الحصول على المدن والتصنيفات المتاحة للتصفية
-    cities = db.session.query(Job.city).distinct().filter_by(status='Published').all()
-    categories = db.session.query(Job.category_name).distinct().filter_by(status='Published').all()
-    
-    return render_template('index.html', jobs=jobs, cities=cities, categories=categories)
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    """التحقق من أن استعلامات المسارات الرئيسية تستخدم الفهارس"""
+    failures = check_query_plans(db.engine)
+    for route, line in failures:
+        print(f"✗ {route}: {line}")
+    if failures:
+        raise SystemExit(1)
+    print("✓ كل الاستعلامات تستخدم الفهارس")
 
 
-@app.route('/search')
-def search_jobs():
-    """البحث والتصفية على الوظائف"""
-    city = request.args.get('city', '')
-    category = request.args.get('category', '')
-    job_type = request.args.get('job_type', '')
-    
-    query = Job.query.filter_by(status='Published')
+@bp.cli.command('check-query-budget')
+@click.option('--rows', default=1000, help='عدد الطلبات في القياس الأول (الثاني عشرة أضعافه)')
+def check_query_budget_command(rows):
+    """التحقق من أن عدد استعلامات الصفحات الرئيسية لا يزيد مع عدد الصفوف (على قاعدة SQLite مؤقتة)"""
+    results = check_query_budget(create_app, rows, current_app.template_folder)
+
+    failed = False
+    for route, size, count, budget in results:
+        ok = count is not None and count <= budget
+        failed = failed or not ok
+        shown = 'خطأ' if count is None else count
+        print(f"{'✓' if ok else '✗'} {route} ({size:,} طلب): {shown} استعلام، الحد {budget}")
+    if failed:
+        raise SystemExit(1)
+
+
+@bp.cli.command('generate-data')
+@click.option('--companies', default=100, help='عدد الشركات')
+@click.option('--jobs', default=1000, help='عدد الوظائف')
+@click.option('--seekers', default=10000, help='عدد الباحثين عن عمل')
+@click.option('--applications', default=50000, help='عدد الطلبات')
+@click.option('--batch-size', default=5000, help='عدد الصفوف في كل دفعة إدراج')
+@click.option('--seed', default=42, help='بذرة التوليد العشوائي (نفس البذرة = نفس البيانات)')
+def generate_data_command(companies, jobs, seekers, applications, batch_size, seed):
+    """إضافة بيانات عربية تجريبية بأحجام كبيرة لاختبار الأداء"""
+    if jobs and not companies:
+        raise click.BadParameter('الوظائف تحتاج شركة واحدة على الأقل', param_hint='--companies')
+
+    def progress(table, done):
+        if done % (batch_size * 20) == 0:
+            print(f"  {table}: {done:,}")
+
+    generate_synthetic_data(db.engine, companies=companies, jobs=jobs, seekers=seekers,
+                            applications=applications, batch_size=batch_size, seed=seed,
+                            progress=progress)
+    print(f"✓ تمت إضافة {companies:,} شركة و {jobs:,} وظيفة و {seekers:,} باحث و {applications:,} طلب")
+
+
+@bp.cli.command('archive-jobs')
+@click.option('--days', type=int, default=None, help='أرشفة الأقدم من هذا العدد من الأيام (الافتراضي ARCHIVE_AFTER_DAYS)')
+@click.option('--status', 'statuses', multiple=True,
+              help='الحالات المؤرشفة، تتكرر (الافتراضي ARCHIVE_STATUSES)')
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, help='عدد الوظائف في كل معاملة')
+@click.option('--pause', default=0.05, help='الانتظار بالثواني بين الدفعات')
+def archive_jobs_command(days, statuses, batch_size, pause):
+    """نقل الوظائف القديمة المرفوضة والمخفية مع طلباتها إلى جداول الأرشيف (للتشغيل المجدول)"""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    statuses = statuses or current_app.config['ARCHIVE_STATUSES']
+
+    def progress(jobs, applications):
+        if jobs % (batch_size * 20) == 0:
+            print(f"  {jobs:,} وظيفة و {applications:,} طلب")
+
+    jobs, applications = archive_jobs(db.engine, days, statuses, batch_size=batch_size,
+                                      pause=pause, progress=progress)
+    print(f"✓ تمت أرشفة {jobs:,} وظيفة و {applications:,} طلب")
+    with db.engine.connect() as conn:
+        for table, count in table_sizes(conn).items():
+            print(f"  {table}: {count:,}")
+
+
+@bp.cli.command('prune-events')
+@click.option('--days', type=int, default=None, help='حذف الأقدم من هذا العدد من الأيام (الافتراضي EVENTS_RETENTION_DAYS)')
+def prune_events_command(days):
+    """حذف أحداث الإشعارات القديمة والإشعارات المرسلة"""
+    days = current_app.config['EVENTS_RETENTION_DAYS'] if days is None else days
+    print(f"✓ تم حذف {prune_events(db.engine, days):,} حدث")
+    print(f"✓ تم حذف {prune_notifications(db.engine, days):,} إشعار مرسل")
+
+
+@bp.cli.command('notifications-worker')
+@click.option('--batch-size', default=CLAIM_BATCH_SIZE, help='عدد المستلمين في كل دفعة')
+@click.option('--poll-interval', default=2.0, help='الانتظار بالثواني عند فراغ الطابور')
+@click.option('--once', is_flag=True, help='الخروج عند فراغ الطابور')
+def notifications_worker_command(batch_size, poll_interval, once):
+    """إرسال الإشعارات من صندوق الصادر، بريد واحد لكل مستلم في كل دفعة"""
+    run_notifications_worker(current_app._get_current_object(), batch_size=batch_size,
+                             poll_interval=poll_interval, stop_when_idle=once)
+
+
+@bp.cli.command('smtp-stub')
+@click.option('--port', default=1025, help='المنفذ المحلي')
+@click.option('--mbox', default=None, help='حفظ الرسائل المستقبلة في ملف mbox')
+def smtp_stub_command(port, mbox):
+    """خادم SMTP محلي يطبع الرسائل بدلاً من إرسالها (للتطوير)"""
+    from smtp_stub import SmtpStub
+    server = SmtpStub(('127.0.0.1', port), mbox_path=mbox)
+    print(f"✓ خادم SMTP التجريبي على 127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """كتابة بيان بصمات الملفات الثابتة ونسخها المضغوطة مسبقاً (قبل تشغيل الخادم)"""
+    digests, compressed = build_assets(current_app.static_folder)
+    print(f"✓ {len(digests)} ملف ثابت، {compressed} منها مضغوط مسبقاً")
+
+
+@bp.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """إعادة بناء عدادات الطلبات لكل وظيفة ولكل شركة يومياً من جدول الطلبات"""
+    with db.engine.begin() as conn:
+        rebuild_rollups(conn)
+    print("✓ تم إعادة بناء عدادات لوحة الشركة")
+
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """إعادة بناء فهرس البحث النصي"""
+    rebuild_search_index(db.engine)
+    print("✓ تم إعادة بناء فهرس البحث")
+
+# بطاقات الوظائف تحتاج اسم الشركة فقط ولا تعرض المتطلبات
+JOB_CARD_OPTIONS = (
+    defer(Job.requirements),
+    joinedload(Job.company).load_only(Company.company_name),
+)
+
+
+def with_next_link(body, next_url):
+    """إرفاق رابط الصفحة التالية في ترويسة Link"""
+    response = make_response(body)
+    if next_url:
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+
+# ==================== الصفحات العامة ====================
+
+def published_jobs_page(keyword='', city='', category='', job_type='', cursor=None, per_page=12):
+    """صفحة من الوظائف المنشورة مع التصفية والبحث النصي (مشتركة بين الصفحات وواجهة JSON)"""
+    query = Job.query.filter_by(status='Published').options(*JOB_CARD_OPTIONS)
     
     if city:
         query = query.filter_by(city=city)
@@ -67,20 +329,196 @@ def search_jobs():
     if job_type:
         query = query.filter_by(job_type=job_type)
     
-    jobs = query.all()
-    return render_template('search_results.html', jobs=jobs)
+    # البحث النصي عبر الفهرس مع ترتيب النتائج حسب الصلة
+    ranked = ranked_matches(keyword, db.engine.dialect.name) if keyword else None
+    if ranked is not None:
+        query = query.join(ranked, ranked.c.job_id == Job.job_id)
+        return keyset_paginate(query, [ranked.c.rank, Job.job_id], cursor,
+                               per_page=per_page, descending=False)
+    if keyword:
+        query = query.filter(Job.title.ilike(f'%{keyword}%'))
+    return keyset_paginate(query, [Job.posted_at, Job.job_id], cursor, per_page=per_page)
+
+
+def job_filters():
+    """قراءة معاملات البحث والتصفية من الرابط"""
+    return {
+        'keyword': request.args.get('q', '').strip(),
+        'city': request.args.get('city', ''),
+        'category': request.args.get('category', ''),
+        'job_type': request.args.get('job_type', ''),
+    }
+
+
+def filters_url(endpoint, filters, cursor):
+    return url_for(endpoint, q=filters['keyword'] or None, city=filters['city'] or None,
+                   category=filters['category'] or None, job_type=filters['job_type'] or None,
+                   cursor=cursor)
+
+
+def published_version(**kwargs):
+    return get_version(PUBLISHED_JOBS)
+
+
+def job_revision(job_id):
+    return db.session.execute(db.select(Job.revision).where(Job.job_id == job_id)).scalar()
+
+
+@bp.route('/service-worker.js')
+def service_worker():
+    """Service Worker من جذر الموقع ليشمل نطاقه كل الصفحات، برقم إصدار الأصول الحالي"""
+    precache = [url_for('static', filename=name)
+                for name in ('css/style.css', 'js/app.js', 'manifest.json')]
+    response = make_response(service_worker_source(precache))
+    response.mimetype = 'application/javascript'
+    # المتصفح يتحقق من النسخة في كل زيارة؛ تغيرها يثبّت الإصدار الجديد
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@bp.route('/')
+@read_replica
+@cached_page(published_version)
+def index():
+    """الصفحة الرئيسية - عرض الوظائف المنشورة"""
+    jobs = published_jobs_page(cursor=request.args.get('cursor'))
+    
+    # المدن والتصنيفات وأنواع الدوام المتاحة للتصفية (من الذاكرة المؤقتة)
+    facets = published_facets()
+    
+    next_url = url_for('main.index', cursor=jobs.next_cursor) if jobs.has_next else None
+    return with_next_link(
+        render_template('index.html', jobs=jobs, facets=facets, next_url=next_url),
+        next_url)
+
 
+@bp.route('/search')
+@read_replica
+@cached_page(published_version)
+def search_jobs():
+    """البحث والتصفية على الوظائف"""
+    filters = job_filters()
+    jobs = published_jobs_page(**filters, cursor=request.args.get('cursor'),
+                               per_page=request.args.get('per_page', 12, type=int))
+    
+    next_url = filters_url('main.search_jobs', filters, jobs.next_cursor) if jobs.has_next else None
+    return with_next_link(
+        render_template('search_results.html', jobs=jobs, keyword=filters['keyword'],
+                        city=filters['city'], category=filters['category'],
+                        job_type=filters['job_type'], next_url=next_url),
+        next_url)
 
-@app.route('/job/<int:job_id>')
+
+@bp.route('/job/<int:job_id>')
+@read_replica
+@cached_page(job_revision)
 def job_detail(job_id):
     """صفحة تفاصيل الوظيفة"""
-    job = Job.query.get_or_404(job_id)
+    job = Job.query.options(joinedload(Job.company)).get_or_404(job_id)
     return render_template('job_detail.html', job=job)
 
 
+# ==================== واجهة JSON للقراءة (v1) ====================
+
+def job_card_json(job):
+    return {
+        'job_id': job.job_id,
+        'title': job.title,
+        'company_name': job.company.company_name,
+        'city': job.city,
+        'category_name': job.category_name,
+        'job_type': job.job_type,
+        'salary': job.salary,
+        'posted_at': job.posted_at.isoformat() if job.posted_at else None,
+        'url': url_for('main.job_detail', job_id=job.job_id),
+    }
+
+
+def conditional_json(etag, build):
+    """استجابة JSON بترويسة ETag ضعيفة؛ إذا طابقت نسخة العميل تُرجع 304 دون تنفيذ build
+
+    build تُرجع None إذا لم يوجد المورد.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body = build()
+        if body is None:
+            return jsonify({'error': 'غير موجود'}), 404
+        response = jsonify(body)
+    response.set_etag(etag, weak=True)
+    # يحتفظ المتصفح بالنسخة لكن يتحقق منها في كل مرة
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+def published_etag(*parts):
+    """الوسم مشتق من إصدار الوظائف المنشورة، فيتغير فقط عند تغير ما يظهر للزوار"""
+    return '-'.join(['v1', str(get_version(PUBLISHED_JOBS)), *map(str, parts)])
+
+
+@bp.route('/api/v1/jobs')
+@read_replica
+def api_jobs():
+    """الوظائف المنشورة بنفس تصفية /search وترقيمها"""
+    filters = job_filters()
+    cursor = request.args.get('cursor')
+    per_page = request.args.get('per_page', 12, type=int)
+
+    def build():
+        jobs = published_jobs_page(**filters, cursor=cursor, per_page=per_page)
+        next_url = filters_url('main.api_jobs', filters, jobs.next_cursor) if jobs.has_next else None
+        return {
+            'jobs': [job_card_json(job) for job in jobs.items],
+            'next_cursor': jobs.next_cursor,
+            'next': next_url,
+        }
+
+    return conditional_json(published_etag(), build)
+
+
+@bp.route('/api/v1/jobs/<int:job_id>')
+@read_replica
+def api_job_detail(job_id):
+    """تفاصيل وظيفة منشورة"""
+    def build():
+        job = (Job.query.filter_by(job_id=job_id, status='Published')
+               .options(joinedload(Job.company)).first())
+        if job is None:
+            return None
+        return dict(job_card_json(job), description=job.description,
+                    requirements=job.requirements, company_city=job.company.city)
+
+    return conditional_json(published_etag(job_id), build)
+
+
+@bp.route('/api/v1/facets')
+@read_replica
+def api_facets():
+    """قيم التصفية المتاحة مع عدد الوظائف المنشورة لكل قيمة"""
+    def build():
+        facets = published_facets()
+        return {
+            name: [{'value': value, 'count': count} for value, count in facets[name]]
+            for name in ('cities', 'categories', 'job_types')
+        } | {'total': facets['total']}
+
+    return conditional_json(published_etag(), build)
+
+
 # ==================== نظام المصادقة ====================
 
-@app.route('/login', methods=['GET', 'POST'])
+def authenticate(user, password):
+    """التحقق من كلمة المرور وترقية الهاش المخزن إذا تغيرت خوارزمية أو تكلفة التجزئة"""
+    if user is None or not password or not user.check_password(password):
+        return False
+    if needs_rehash(user.password):
+        user.set_password(password)
+        db.session.commit()
+    return True
+
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """صفحة تسجيل الدخول الموحدة"""
     if request.method == 'POST':
@@ -88,36 +526,39 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        if user_type == 'admin':
-            admin = Admin.query.filter_by(email=email).first()
-            if admin and admin.check_password(password):
-                session['user_id'] = admin.admin_id
-                session['user_type'] = 'admin'
-                session['user_name'] = admin.full_name
-                return redirect(url_for('admin_dashboard'))
-        
-        elif user_type == 'company':
-            company = Company.query.filter_by(email=email).first()
-            if company and company.check_password(password):
-                session['user_id'] = company.company_id
-                session['user_type'] = 'company'
-                session['user_name'] = company.company_name
-                return redirect(url_for('company_dashboard'))
-        
-        elif user_type == 'seeker':
-            seeker = JobSeeker.query.filter_by(email=email).first()
-            if seeker and seeker.check_password(password):
-                session['user_id'] = seeker.seeker_id
-                session['user_type'] = 'seeker'
-                session['user_name'] = seeker.full_name
-                return redirect(url_for('seeker_dashboard'))
-        
+        try:
+            if user_type == 'admin':
+                admin = Admin.query.filter_by(email=email).first()
+                if authenticate(admin, password):
+                    session['user_id'] = admin.admin_id
+                    session['user_type'] = 'admin'
+                    session['user_name'] = admin.full_name
+                    return redirect(url_for('main.admin_dashboard'))
+
+            elif user_type == 'company':
+                company = Company.query.filter_by(email=email).first()
+                if authenticate(company, password):
+                    session['user_id'] = company.company_id
+                    session['user_type'] = 'company'
+                    session['user_name'] = company.company_name
+                    return redirect(url_for('main.company_dashboard'))
+
+            elif user_type == 'seeker':
+                seeker = JobSeeker.query.filter_by(email=email).first()
+                if authenticate(seeker, password):
+                    session['user_id'] = seeker.seeker_id
+                    session['user_type'] = 'seeker'
+                    session['user_name'] = seeker.full_name
+                    return redirect(url_for('main.seeker_dashboard'))
+        except HashingBusy:
+            return render_template('login.html', error='الخادم مشغول حالياً، يرجى المحاولة بعد قليل'), 503
+
         return render_template('login.html', error='البريد الإلكتروني أو كلمة المرور غير صحيحة')
     
     return render_template('login.html')
 
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     """صفحة التسجيل"""
     if request.method == 'POST':
@@ -138,7 +579,7 @@ def register():
             db.session.add(seeker)
             db.session.commit()
             
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         
         elif user_type == 'company':
             company_name = request.form.get('company_name')
@@ -156,34 +597,53 @@ def register():
             db.session.add(company)
             db.session.commit()
             
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
     
     return render_template('register.html')
 
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """تسجيل الخروج"""
     session.clear()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 
 # ==================== لوحة تحكم الباحث ====================
 
-@app.route('/seeker/dashboard')
+@bp.route('/seeker/dashboard')
 def seeker_dashboard():
     """لوحة تحكم الباحث عن عمل"""
     if 'user_type' not in session or session['user_type'] != 'seeker':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     seeker_id = session['user_id']
     seeker = JobSeeker.query.get(seeker_id)
-    applications = Application.query.filter_by(seeker_id=seeker_id).all()
+    applications = (
+        Application.query.filter_by(seeker_id=seeker_id)
+        .options(joinedload(Application.job).load_only(Job.title)
+                 .joinedload(Job.company).load_only(Company.company_name))
+        .order_by(Application.applied_at.desc())
+        .all()
+    )
+    
+    # الوظائف المقترحة حسب المدينة والوظائف التي تقدم عليها، بنفس ترتيب الدرجات
+    recommended_ids = recommend_jobs(seeker, exclude={a.job_id for a in applications},
+                                     limit=current_app.config['RECOMMENDATIONS_COUNT'])
+    jobs = {
+        job.job_id: job
+        for job in Job.query.filter(Job.job_id.in_(recommended_ids), Job.status == 'Published')
+        .options(load_only(Job.job_id, Job.title, Job.city, Job.job_type, Job.salary),
+                 joinedload(Job.company).load_only(Company.company_name))
+    } if recommended_ids else {}
+    recommended_jobs = [jobs[job_id] for job_id in recommended_ids if job_id in jobs]
     
-    return render_template('seeker_dashboard.html', seeker=seeker, applications=applications)
+    return render_template('seeker_dashboard.html', seeker=seeker, applications=applications,
+                           recommended_jobs=recommended_jobs,
+                           last_event_id=latest_event_id(SEEKER, seeker_id))
 
 
-@app.route('/seeker/apply/<int:job_id>', methods=['POST'])
+@bp.route('/seeker/apply/<int:job_id>', methods=['POST'])
 def apply_job(job_id):
     """تقديم طلب على وظيفة مع رفع السيرة الذاتية"""
     if 'user_type' not in session or session['user_type'] != 'seeker':
@@ -192,11 +652,6 @@ def apply_job(job_id):
     seeker_id = session['user_id']
     cover_letter = request.form.get('cover_letter')
     
-    # التحقق من عدم التقديم مسبقاً
-    existing_app = Application.query.filter_by(job_id=job_id, seeker_id=seeker_id).first()
-    if existing_app:
-        return jsonify({'success': False, 'message': 'لقد قدمت على هذه الوظيفة بالفعل'}), 400
-    
     cv_filename = None
     
     # معالجة رفع الملف
@@ -206,12 +661,9 @@ def apply_job(job_id):
             if not allowed_file(file.filename):
                 return jsonify({'success': False, 'message': 'صيغة الملف غير مدعومة. استخدم PDF أو DOC أو DOCX'}), 400
             
-            # حفظ الملف بشكل آمن
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-            filename = timestamp + filename
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            cv_filename = filename
+            # حفظ الملف مرة واحدة حسب بصمة محتواه (SHA-256)
+            extension = file.filename.rsplit('.', 1)[1].lower()
+            cv_filename = save_cv(current_app.config['UPLOAD_FOLDER'], file, extension)
     
     # إنشاء الطلب
     application = Application(
@@ -222,43 +674,113 @@ def apply_job(job_id):
         status='Pending'
     )
     db.session.add(application)
-    db.session.commit()
+    
+    # التحقق من عدم التقديم مسبقاً عبر القيد الفريد (job_id, seeker_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'لقد قدمت على هذه الوظيفة بالفعل'}), 400
     
     return jsonify({'success': True, 'message': 'تم تقديم الطلب بنجاح'})
 
 
-@app.route('/uploads/<filename>')
+@bp.route('/uploads/<filename>')
 def download_cv(filename):
-    """تحميل السيرة الذاتية"""
+    """تحميل السيرة الذاتية (للشركة صاحبة الوظيفة أو للباحث صاحب الطلب فقط)"""
+    user_type = session.get('user_type')
+    if user_type not in ('company', 'seeker'):
+        return redirect(url_for('main.login'))
+    
+    filename = secure_filename(filename)
+    owned = Application.query.filter(Application.cv_filename == filename)
+    if user_type == 'seeker':
+        owned = owned.filter(Application.seeker_id == session['user_id'])
+    else:
+        owned = owned.join(Job).filter(Job.company_id == session['user_id'])
+    if not db.session.query(owned.exists()).scalar():
+        return "غير مصرح لك بتحميل هذا الملف", 403
+    
+    file_path = blob_path(current_app.config['UPLOAD_FOLDER'], filename)
+    
+    # الخادم الأمامي يتولى نقل الملف (ومعه ETag و Range)
+    prefix = current_app.config['CV_ACCEL_REDIRECT_PREFIX']
+    if prefix:
+        relative = os.path.relpath(file_path, current_app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        response = Response(headers={
+            'X-Accel-Redirect': prefix.rstrip('/') + '/' + relative,
+            'Content-Disposition': f'attachment; filename={filename}',
+        })
+        response.headers.pop('Content-Type')
+        return response
+    
+    # بصمة المحتوى هي ETag قوية للملفات المخزنة حسب المحتوى
+    etag = filename.split('.', 1)[0] if is_blob_name(filename) else True
     try:
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
-        if os.path.exists(file_path):
-            return send_file(file_path, as_attachment=True)
+        response = send_file(file_path, as_attachment=True, conditional=True, etag=etag,
+                             max_age=3600)
+    except FileNotFoundError:
         return "الملف غير موجود", 404
-    except Exception as e:
-        return str(e), 500
+    
+    # الملف خاص بالمستخدم فلا يُخزن في ذاكرات وسيطة مشتركة
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.vary.add('Cookie')
+    return response
+
+
+# ==================== الإشعارات الفورية ====================
+
+@bp.route('/events/stream')
+def events_stream():
+    """بث أحداث الباحث (حالة طلباته) أو الشركة (الطلبات الجديدة) بصيغة SSE"""
+    user_type = session.get('user_type')
+    if user_type not in (SEEKER, COMPANY):
+        return jsonify({'success': False}), 401
+    
+    # المتصفح يرسل Last-Event-ID عند إعادة الاتصال تلقائياً، والرابط يحمل الرقم عند أول اتصال
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        last_id = latest_event_id(user_type, session['user_id'])
+    
+    return event_stream(user_type, session['user_id'], last_id)
 
 
 # ==================== لوحة تحكم الشركة ====================
 
-@app.route('/company/dashboard')
+@bp.route('/company/dashboard')
 def company_dashboard():
     """لوحة تحكم الشركة"""
     if 'user_type' not in session or session['user_type'] != 'company':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     company_id = session['user_id']
     company = Company.query.get(company_id)
-    jobs = Job.query.filter_by(company_id=company_id).all()
+    jobs = Job.query.filter_by(company_id=company_id).options(defer(Job.description), defer(Job.requirements)).all()
+    
+    # العدادات مجمعة مسبقاً: صف لكل وظيفة بدلاً من عدّ كل الطلبات في كل زيارة
+    job_stats = company_job_stats(company_id)
+    application_counts = {job_id: stats.applications for job_id, stats in job_stats.items()}
+    status_counts = {
+        status: sum(getattr(stats, status) for stats in job_stats.values())
+        for status in ('pending', 'accepted', 'rejected')
+    }
     
-    return render_template('company_dashboard.html', company=company, jobs=jobs)
+    return render_template('company_dashboard.html', company=company, jobs=jobs,
+                           application_counts=application_counts,
+                           total_applications=sum(application_counts.values()),
+                           status_counts=status_counts,
+                           daily_applications=daily_applications(company_id, current_app.config['ANALYTICS_DAYS']),
+                           last_event_id=latest_event_id(COMPANY, company_id))
 
 
-@app.route('/company/add-job', methods=['GET', 'POST'])
+@bp.route('/company/add-job', methods=['GET', 'POST'])
 def add_job():
     """إضافة وظيفة جديدة"""
     if 'user_type' not in session or session['user_type'] != 'company':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     if request.method == 'POST':
         company_id = session['user_id']
@@ -278,35 +800,107 @@ def add_job():
         db.session.add(job)
         db.session.commit()
         
-        return redirect(url_for('company_dashboard'))
+        return redirect(url_for('main.company_dashboard'))
     
     return render_template('add_job.html')
 
 
-@app.route('/company/job/<int:job_id>/applicants')
+@bp.route('/company/jobs/import', methods=['POST'])
+def import_company_jobs():
+    """استيراد عدة وظائف من ملف CSV أو JSON مع تقرير بأخطاء كل صف"""
+    if 'user_type' not in session or session['user_type'] != 'company':
+        return jsonify({'success': False, 'message': 'يجب تسجيل الدخول أولاً'}), 401
+
+    file = request.files.get('jobs_file')
+    if not file or not file.filename:
+        return jsonify({'success': False, 'message': 'يرجى اختيار ملف الوظائف'}), 400
+
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    try:
+        imported, errors = import_jobs(session['user_id'], read_rows(file, extension))
+    except ImportFormatError as error:
+        return jsonify({'success': False, 'message': str(error), 'imported': error.imported}), 400
+
+    return jsonify({
+        'success': not errors,
+        'message': f'تم استيراد {imported} وظيفة وهي بانتظار موافقة المشرف',
+        'imported': imported,
+        'failed': len(errors),
+        'errors': errors,
+    })
+
+
+@bp.route('/company/job/<int:job_id>/applicants')
 def job_applicants(job_id):
     """عرض المتقدمين على وظيفة"""
     if 'user_type' not in session or session['user_type'] != 'company':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     job = Job.query.get_or_404(job_id)
     
     # التحقق من أن الوظيفة تابعة للشركة الحالية
     if job.company_id != session['user_id']:
-        return redirect(url_for('company_dashboard'))
+        return redirect(url_for('main.company_dashboard'))
+    
+    keyword = request.args.get('q', '').strip()
+    query = Application.query.filter_by(job_id=job_id).options(joinedload(Application.seeker))
+    
+    # البحث داخل نصوص السير الذاتية مع ترتيب المتقدمين حسب الصلة
+    if keyword:
+        query = query.join(CvText, CvText.name == Application.cv_filename)
+        ranked = ranked_cv_matches(keyword, db.engine.dialect.name)
+        if ranked is not None:
+            query = query.join(ranked, ranked.c.cv_id == CvText.id).order_by(ranked.c.rank)
+        else:
+            query = query.filter(CvText.content.ilike(f'%{keyword}%'))
     
-    applications = Application.query.filter_by(job_id=job_id).all()
+    applications = query.all()
     
-    return render_template('job_applicants.html', job=job, applications=applications)
+    return render_template('job_applicants.html', job=job, applications=applications,
+                           keyword=keyword)
 
 
-@app.route('/company/application/<int:app_id>/status', methods=['POST'])
+@bp.route('/company/job/<int:job_id>/applicants/export')
+def export_job_applicants(job_id):
+    """تصدير المتقدمين على وظيفة كملف CSV"""
+    if 'user_type' not in session or session['user_type'] != 'company':
+        return redirect(url_for('main.login'))
+    
+    job = Job.query.options(load_only(Job.company_id)).get_or_404(job_id)
+    if job.company_id != session['user_id']:
+        return redirect(url_for('main.company_dashboard'))
+    
+    return applicants_csv_response(applicants_query(session['user_id'], job_id),
+                                   f'applicants-job-{job_id}.csv')
+
+
+@bp.route('/company/applicants/export')
+def export_company_applicants():
+    """تصدير المتقدمين على كل وظائف الشركة كملف CSV"""
+    if 'user_type' not in session or session['user_type'] != 'company':
+        return redirect(url_for('main.login'))
+    
+    return applicants_csv_response(applicants_query(session['user_id']),
+                                   f'applicants-company-{session["user_id"]}.csv')
+
+
+def applicants_csv_response(stmt, filename):
+    """استجابة متدفقة: الذاكرة ثابتة مهما كان عدد المتقدمين"""
+    return Response(
+        stream_with_context(stream_applicants_csv(stmt)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+
+
+@bp.route('/company/application/<int:app_id>/status', methods=['POST'])
 def update_application_status(app_id):
     """تحديث حالة الطلب"""
     if 'user_type' not in session or session['user_type'] != 'company':
         return jsonify({'success': False}), 403
     
-    application = Application.query.get_or_404(app_id)
+    application = Application.query.options(
+        joinedload(Application.job).load_only(Job.company_id)).get_or_404(app_id)
     
     # التحقق من أن الطلب يتعلق بوظيفة تابعة للشركة
     if application.job.company_id != session['user_id']:
@@ -324,20 +918,55 @@ def update_application_status(app_id):
 
 # ==================== لوحة تحكم المشرف ====================
 
-@app.route('/admin/dashboard')
+@bp.route('/admin/dashboard')
 def admin_dashboard():
     """لوحة تحكم المشرف"""
     if 'user_type' not in session or session['user_type'] != 'admin':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
+    
+    # بطاقات الإحصائيات باستعلامات تجميعية بدلاً من تحميل كل الصفوف
+    company_counts = dict(db.session.query(Company.status, func.count()).group_by(Company.status))
+    job_counts = dict(db.session.query(Job.status, func.count()).group_by(Job.status))
+    seeker_total = db.session.query(func.count(JobSeeker.seeker_id)).scalar()
+    
+    # جداول الإشراف: الطلبات المعلقة هي العرض الافتراضي
+    company_status = request.args.get('company_status', 'Pending')
+    job_status = request.args.get('job_status', 'Pending')
     
-    companies = Company.query.all()
-    jobs = Job.query.all()
-    seekers = JobSeeker.query.all()
+    companies = moderation_page(Company.query, Company.status, [Company.company_id],
+                                company_status, request.args.get('company_cursor'))
+    jobs = moderation_page(Job.query.options(*JOB_CARD_OPTIONS), Job.status,
+                           [Job.posted_at, Job.job_id], job_status, request.args.get('job_cursor'))
+    seekers = keyset_paginate(JobSeeker.query, [JobSeeker.seeker_id],
+                              request.args.get('seeker_cursor'), per_page=ADMIN_PAGE_SIZE)
     
-    return render_template('admin_dashboard.html', companies=companies, jobs=jobs, seekers=seekers)
+    def admin_url(**changes):
+        """رابط للوحة مع الإبقاء على حالة الجداول الأخرى"""
+        args = request.args.to_dict()
+        args.update(changes)
+        return url_for('main.admin_dashboard', **{key: value for key, value in args.items() if value is not None})
+    
+    return render_template('admin_dashboard.html',
+                           company_counts=company_counts, job_counts=job_counts,
+                           seeker_total=seeker_total,
+                           company_status=company_status, job_status=job_status,
+                           companies=companies, jobs=jobs, seekers=seekers,
+                           admin_url=admin_url)
+
+
+ADMIN_PAGE_SIZE = 20
+
 
+def moderation_page(query, status_column, key_columns, status, cursor):
+    """صفحة من جدول إشراف مفلتر بالحالة؛ عند عرض الكل تأتي العناصر المعلقة أولاً"""
+    if status:
+        query = query.filter(status_column == status)
+    else:
+        key_columns = [case((status_column == 'Pending', 1), else_=0), *key_columns]
+    return keyset_paginate(query, key_columns, cursor, per_page=ADMIN_PAGE_SIZE)
 
-@app.route('/admin/company/<int:company_id>/status', methods=['POST'])
+
+@bp.route('/admin/company/<int:company_id>/status', methods=['POST'])
 def update_company_status(company_id):
     """تحديث حالة الشركة"""
     if 'user_type' not in session or session['user_type'] != 'admin':
@@ -352,7 +981,7 @@ def update_company_status(company_id):
     return jsonify({'success': True})
 
 
-@app.route('/admin/job/<int:job_id>/status', methods=['POST'])
+@bp.route('/admin/job/<int:job_id>/status', methods=['POST'])
 def update_job_status(job_id):
     """تحديث حالة الوظيفة"""
     if 'user_type' not in session or session['user_type'] != 'admin':
@@ -367,17 +996,167 @@ def update_job_status(job_id):
     return jsonify({'success': True})
 
 
+# الحالات المسموحة في الإشراف الجماعي
+COMPANY_STATUSES = {'Pending', 'Approved', 'Rejected'}
+JOB_STATUSES = {'Pending', 'Published', 'Rejected', 'Hidden'}
+# عدد المعرّفات في كل عبارة UPDATE حتى لا نتجاوز حد المتغيرات في SQLite
+BATCH_UPDATE_CHUNK = 500
+
+
+def batch_update_status(model, id_column, status, ids=None, from_status=None, **values):
+    """تحديث حالة مجموعة صفوف بعبارة UPDATE واحدة (لكل دفعة معرّفات) وإرجاع المعرّفات المحدثة
+
+    إما قائمة معرّفات محددة، أو from_status لتحديث كل الصفوف التي بهذه الحالة.
+    values أعمدة إضافية تُحدَّث مع الحالة.
+    """
+    stmt = (
+        update(model)
+        .values(status=status, **values)
+        .returning(id_column)
+        .execution_options(synchronize_session=False)
+    )
+    if from_status is not None:
+        return set(db.session.execute(stmt.where(model.status == from_status)).scalars())
+
+    updated = set()
+    for start in range(0, len(ids), BATCH_UPDATE_CHUNK):
+        chunk = ids[start:start + BATCH_UPDATE_CHUNK]
+        updated.update(db.session.execute(stmt.where(id_column.in_(chunk))).scalars())
+    return updated
+
+
+def batch_status_request(allowed):
+    """قراءة (المعرّفات، الحالة الجديدة، الحالة الحالية) من طلب JSON أو نموذج"""
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {'ids': request.form.getlist('ids'), 'status': request.form.get('status'),
+                'from_status': request.form.get('from_status')}
+
+    status, from_status = data.get('status'), data.get('from_status') or None
+    if status not in allowed or (from_status is not None and from_status not in allowed):
+        raise ValueError('حالة غير صالحة')
+    if from_status is not None:
+        return None, status, from_status
+    try:
+        ids = sorted({int(value) for value in data.get('ids') or []})
+    except (TypeError, ValueError):
+        raise ValueError('معرّفات غير صالحة')
+    if not ids:
+        raise ValueError('لم يتم تحديد أي عنصر')
+    return ids, status, None
+
+
+@bp.route('/admin/companies/status', methods=['POST'])
+def batch_update_company_status():
+    """تحديث حالة عدة شركات في طلب واحد"""
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        return jsonify({'success': False}), 403
+
+    try:
+        ids, status, from_status = batch_status_request(COMPANY_STATUSES)
+    except ValueError as error:
+        return jsonify({'success': False, 'message': str(error)}), 400
+
+    updated = batch_update_status(Company, Company.company_id, status, ids, from_status)
+    # التحديث الجماعي لا يمر على أحداث الجلسة، فتُكتب الإشعارات هنا في نفس المعاملة
+    enqueue_company_status(db.session.connection(), updated)
+    db.session.commit()
+
+    return jsonify({'success': True, 'updated': len(updated),
+                    'not_found': [i for i in ids or [] if i not in updated]})
+
+
+@bp.route('/admin/jobs/status', methods=['POST'])
+def batch_update_job_status():
+    """تحديث حالة عدة وظائف في طلب واحد"""
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        return jsonify({'success': False}), 403
+
+    try:
+        ids, status, from_status = batch_status_request(JOB_STATUSES)
+    except ValueError as error:
+        return jsonify({'success': False, 'message': str(error)}), 400
+
+    # التحديث الجماعي لا يمر على أحداث الجلسة، فيُزاد رقم المراجعة وإصدار الوظائف المنشورة هنا
+    updated = batch_update_status(Job, Job.job_id, status, ids, from_status,
+                                  revision=Job.revision + 1)
+    if updated:
+        bump_version(db.session.connection(), PUBLISHED_JOBS)
+    enqueue_job_status(db.session.connection(), updated)
+    db.session.commit()
+
+    return jsonify({'success': True, 'updated': len(updated),
+                    'not_found': [i for i in ids or [] if i not in updated]})
+
+
+# ==================== أرشيف الوظائف ====================
+
+@bp.route('/admin/archive')
+def admin_archive():
+    """البحث في الوظائف المؤرشفة مع عدد طلباتها"""
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        return redirect(url_for('main.login'))
+    
+    keyword = request.args.get('q', '').strip()
+    status = request.args.get('status', '')
+    company_id = request.args.get('company_id', type=int)
+    
+    query = ArchivedJob.query.options(joinedload(ArchivedJob.company).load_only(Company.company_name))
+    if keyword:
+        query = query.filter(ArchivedJob.title.contains(keyword, autoescape=True))
+    if status:
+        query = query.filter(ArchivedJob.status == status)
+    if company_id:
+        query = query.filter(ArchivedJob.company_id == company_id)
+    jobs = keyset_paginate(query, [ArchivedJob.archived_at, ArchivedJob.job_id],
+                           request.args.get('cursor'), per_page=ADMIN_PAGE_SIZE)
+    
+    # عدد الطلبات للصفحة الحالية فقط باستعلام واحد
+    application_counts = dict(
+        db.session.query(ArchivedApplication.job_id, func.count())
+        .filter(ArchivedApplication.job_id.in_([job.job_id for job in jobs]))
+        .group_by(ArchivedApplication.job_id)
+    ) if jobs.items else {}
+    
+    filters = {'q': keyword or None, 'status': status or None, 'company_id': company_id}
+    next_url = url_for('main.admin_archive', cursor=jobs.next_cursor,
+                       **{key: value for key, value in filters.items() if value}) if jobs.has_next else None
+    
+    return render_template('admin_archive.html', jobs=jobs, application_counts=application_counts,
+                           keyword=keyword, status=status, next_url=next_url,
+                           archived_total=db.session.query(func.count(ArchivedJob.job_id)).scalar())
+
+
+@bp.route('/admin/archive/<int:job_id>/restore', methods=['POST'])
+def restore_archived_job(job_id):
+    """إعادة وظيفة مؤرشفة مع طلباتها إلى الجداول الحية"""
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        return jsonify({'success': False}), 403
+    
+    try:
+        restored = restore_job(db.session.connection(), job_id)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'رقم الوظيفة مستخدم لوظيفة حالية'}), 409
+    if restored is None:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'الوظيفة غير موجودة في الأرشيف'}), 404
+    db.session.commit()
+    
+    return jsonify({'success': True, 'applications': restored})
+
+
 # ==================== معالجة الأخطاء ====================
 
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found(error):
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def server_error(error):
     return render_template('500.html'), 500
 
 
 if __name__ == '__main__':
-    app.run(debug=False, host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
+    create_app().run(debug=False, host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from analytics import forget_jobs, recount_jobs
+from cache import PUBLISHED_JOBS, bump_version
+from models import Job, Application, ArchivedJob, ArchivedApplication
+from search import index_jobs, unindex_jobs
+
+# ==================== أرشفة الوظائف القديمة ====================
+
+# الحالات المؤرشفة افتراضياً؛ الوظائف المنشورة والمعلقة تبقى في الجداول الحية
+ARCHIVE_STATUSES = ('Rejected', 'Hidden')
+# عدد الوظائف في كل معاملة؛ المعاملة القصيرة لا تحجز الجداول الحية طويلاً
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _archived(rows, archived_at):
+    return [dict(row, archived_at=archived_at) for row in rows]
+
+
+def _live(row):
+    return {key: value for key, value in row.items() if key != 'archived_at'}
+
+
+def archive_jobs(engine, older_than_days, statuses=ARCHIVE_STATUSES, batch_size=ARCHIVE_BATCH_SIZE,
+                 pause=0.0, progress=None):
+    """نقل الوظائف بالحالات المحددة والأقدم من older_than_days يوماً مع كل طلباتها إلى الأرشيف
+
+    كل دفعة في معاملة مستقلة، والصفوف تُحذف بـ DELETE ... RETURNING ثم تُدرج في الأرشيف
+    فلا يضيع صف بين القراءة والحذف. pause ثوانٍ بين الدفعات لإفساح المجال لباقي الكتابات.
+    تعيد (عدد الوظائف، عدد الطلبات).
+    """
+    before = datetime.utcnow() - timedelta(days=older_than_days)
+    stale = (Job.status.in_(statuses), Job.posted_at < before)
+    report = progress or (lambda jobs, applications: None)
+    total_jobs = total_applications = 0
+
+    while True:
+        with engine.begin() as conn:
+            # PostgreSQL: قفل الدفعة وتخطي الصفوف المقفلة لدى معاملات أخرى؛ SQLite يتجاهل ذلك
+            ids = conn.execute(
+                select(Job.job_id).where(*stale).order_by(Job.job_id).limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not ids:
+                break
+
+            now = datetime.utcnow()
+            applications = conn.execute(
+                delete(Application.__table__).where(Application.job_id.in_(ids))
+                .returning(*Application.__table__.c)
+            ).mappings().all()
+            jobs = conn.execute(
+                delete(Job.__table__).where(Job.job_id.in_(ids)).returning(*Job.__table__.c)
+            ).mappings().all()
+
+            conn.execute(insert(ArchivedJob.__table__), _archived(jobs, now))
+            if applications:
+                conn.execute(insert(ArchivedApplication.__table__), _archived(applications, now))
+            # الحذف المجمع لا يمر على أحداث الجلسة
+            unindex_jobs(conn, ids)
+            forget_jobs(conn, ids)
+            if any(job['status'] == 'Published' for job in jobs):
+                bump_version(conn, PUBLISHED_JOBS)
+
+        total_jobs += len(jobs)
+        total_applications += len(applications)
+        report(total_jobs, total_applications)
+        if pause:
+            time.sleep(pause)
+
+    return total_jobs, total_applications
+
+
+def restore_job(conn, job_id):
+    """إعادة وظيفة مؤرشفة مع طلباتها إلى الجداول الحية بنفس المعرّفات
+
+    تعيد عدد الطلبات المستعادة، أو None إذا لم تكن الوظيفة في الأرشيف.
+    إذا كان المعرّف مستخدماً في jobs يرفع IntegrityError ويجب التراجع عن المعاملة؛ لا يحدث ذلك
+    إلا لمعرّفات أُعيد استخدامها في SQLite قبل الترحيل 14.
+    """
+    applications = conn.execute(
+        delete(ArchivedApplication.__table__).where(ArchivedApplication.job_id == job_id)
+        .returning(*ArchivedApplication.__table__.c)
+    ).mappings().all()
+    job = conn.execute(
+        delete(ArchivedJob.__table__).where(ArchivedJob.job_id == job_id)
+        .returning(*ArchivedJob.__table__.c)
+    ).mappings().first()
+    if job is None:
+        return None
+
+    conn.execute(insert(Job.__table__), [_live(job)])
+    if applications:
+        conn.execute(insert(Application.__table__), [_live(row) for row in applications])
+    index_jobs(conn, [(job['job_id'], job['title'], job['description'], job['requirements'])])
+    recount_jobs(conn, [job_id])
+    if job['status'] == 'Published':
+        bump_version(conn, PUBLISHED_JOBS)
+    return len(applications)
+
+
+def table_sizes(conn):
+    """عدد الصفوف في الجداول الحية وجداول الأرشيف"""
+    return {
+        model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar()
+        for model in (Job, Application, ArchivedJob, ArchivedApplication)
+    }
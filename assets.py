@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # ملفات .br اختيارية؛ المتصفحات كلها تقبل gzip
+    brotli = None
+
+# ==================== بصمات الملفات الثابتة ====================
+
+MANIFEST_NAME = 'assets-manifest.json'
+FINGERPRINT_LENGTH = 12
+# عنوان Service Worker ثابت ولا يحمل بصمة؛ نسخته تُقدَّم من /service-worker.js
+SERVICE_WORKER = 'js/service-worker.js'
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.html', '.txt')
+# سنة كاملة: الملف ذو البصمة لا يتغير محتواه أبداً
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# ترتيب التفضيل بين النسخ المضغوطة مسبقاً
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_FINGERPRINTED = re.compile(rf'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<ext>\.[^./]+)$')
+
+
+def _static_files(folder):
+    """أسماء الملفات الثابتة نسبةً للمجلد، دون النسخ المضغوطة والبيان"""
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')) or name == MANIFEST_NAME:
+                continue
+            yield os.path.relpath(os.path.join(root, name), folder).replace(os.sep, '/')
+
+
+def _digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def compute_digests(folder):
+    """{الاسم: البصمة} لكل ملف ثابت"""
+    if not os.path.isdir(folder):
+        return {}
+    return {name: _digest(os.path.join(folder, name)) for name in sorted(_static_files(folder))}
+
+
+def _write_atomic(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets(folder):
+    """كتابة بيان البصمات والنسخ المضغوطة مسبقاً (gzip و brotli إن توفرت) بجانب كل ملف
+
+    تعيد (البيان، عدد الملفات المضغوطة).
+    """
+    digests = compute_digests(folder)
+    compressed = 0
+    for name in digests:
+        if not name.endswith(COMPRESSIBLE):
+            continue
+        path = os.path.join(folder, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        # mtime=0 يجعل الناتج ثابتاً لنفس المحتوى
+        _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(path + '.br', brotli.compress(data, quality=11))
+        compressed += 1
+    _write_atomic(os.path.join(folder, MANIFEST_NAME),
+                  json.dumps(digests, indent=2, sort_keys=True).encode())
+    return digests, compressed
+
+
+def _load_manifest(folder):
+    """البيان المبني مسبقاً، أو None إذا لم يوجد أو كان أقدم من أحد الملفات"""
+    path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        built_at = os.path.getmtime(path)
+        with open(path, encoding='utf-8') as f:
+            digests = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for name in _static_files(folder):
+        if name not in digests or os.path.getmtime(os.path.join(folder, name)) > built_at:
+            return None
+    return digests
+
+
+class Assets:
+    """بصمات الملفات الثابتة لهذه العملية ورقم إصدار مشتق منها"""
+
+    def __init__(self, folder, digests):
+        self.folder = folder
+        self.digests = digests
+        self.version = hashlib.sha256(
+            json.dumps(digests, sort_keys=True).encode()
+        ).hexdigest()[:FINGERPRINT_LENGTH]
+
+    @classmethod
+    def load(cls, folder):
+        digests = _load_manifest(folder)
+        if digests is None:
+            # بدون build-assets: البصمات تُحسب في الذاكرة عند التشغيل (قراءة فقط)
+            digests = compute_digests(folder)
+        return cls(folder, digests)
+
+    def url_name(self, filename):
+        """اسم الملف بالبصمة كما يظهر في العنوان"""
+        digest = self.digests.get(filename)
+        if digest is None or filename == SERVICE_WORKER:
+            return filename
+        stem, ext = os.path.splitext(filename)
+        return f'{stem}.{digest}{ext}'
+
+    def resolve(self, filename):
+        """(اسم الملف على القرص، هل البصمة مطابقة للمحتوى الحالي)
+
+        البصمة القديمة (صفحة من النشر السابق) تُقدَّم بالملف الحالي دون تخزين طويل.
+        """
+        if filename in self.digests:
+            return filename, False
+        match = _FINGERPRINTED.match(filename)
+        if match:
+            name = match['stem'] + match['ext']
+            if name in self.digests:
+                return name, self.digests[name] == match['digest']
+        return filename, False
+
+
+# ==================== تقديم الملفات ====================
+
+def _precompressed(path):
+    """أفضل نسخة مضغوطة يقبلها المتصفح وليست أقدم من الملف الأصلي"""
+    source_mtime = os.path.getmtime(path)
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings.quality(encoding) <= 0:
+            continue
+        try:
+            if os.path.getmtime(path + suffix) >= source_mtime:
+                return encoding, suffix
+        except OSError:
+            continue
+    return None, ''
+
+
+def serve_static(filename):
+    """بديل مسار static: يفك البصمة، يختار النسخة المضغوطة، ويضبط مدة التخزين"""
+    assets = current_app.extensions['assets']
+    name, immutable = assets.resolve(filename)
+    path = os.path.join(assets.folder, name)
+    if not os.path.isfile(path):
+        abort(404)
+
+    encoding, suffix = _precompressed(path) if name.endswith(COMPRESSIBLE) else (None, '')
+    response = send_from_directory(assets.folder, name + suffix,
+                                   mimetype=mimetypes.guess_type(name)[0])
+    if name.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if immutable and not current_app.debug:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        # بدون بصمة: يتحقق المتصفح في كل مرة ويصله 304 إذا لم يتغير الملف
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+_SW_VERSION = re.compile(r"^const ASSET_VERSION = .*;$", re.M)
+_SW_PRECACHE = re.compile(r"^const PRECACHE_ASSETS = .*;$", re.M)
+
+
+def service_worker_source(precache):
+    """نص Service Worker مع رقم إصدار الأصول وعناوين الملفات بالبصمات
+
+    تغير أي ملف ثابت يغير نص Service Worker، فيثبّت المتصفح النسخة الجديدة
+    وتحذف ذاكرتها القديمة عند التفعيل دون تعديل الملف يدوياً.
+    """
+    assets = current_app.extensions['assets']
+    path = os.path.join(assets.folder, SERVICE_WORKER)
+    if not os.path.isfile(path):
+        abort(404)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    source = _SW_VERSION.sub(lambda m: f'const ASSET_VERSION = {json.dumps(assets.version)};', source, count=1)
+    return _SW_PRECACHE.sub(lambda m: f'const PRECACHE_ASSETS = {json.dumps(precache)};', source, count=1)
+
+
+def init_assets(app):
+    """تحميل البصمات، وإعادة كتابة url_for('static', ...) وتقديم الملفات بها"""
+    assets = Assets.load(app.static_folder)
+    app.extensions['assets'] = assets
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = assets.url_name(values['filename'])
+
+    if 'static' in app.view_functions:
+        app.view_functions['static'] = serve_static
@@ -0,0 +1,83 @@
+"""مقارنة أرقام لوحة الشركة من العدادات المجمعة مع عدّها من جدول الطلبات مباشرة
+
+ينشئ قاعدة SQLite مؤقتة ببيانات من synthetic.py، ثم يقيس الطريقتين لأكبر شركة:
+
+    python benchmarks/bench_company_dashboard.py --jobs 5000 --applications 500000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--seekers', type=int, default=50000)
+    parser.add_argument('--applications', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+    from sqlalchemy import case, func, select
+
+    from analytics import STATUS_COLUMNS, company_job_stats, daily_applications
+    from app import create_app
+    from migrations import upgrade
+    from models import db, Application, Job, JobStats
+    from synthetic import generate
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+        start = time.perf_counter()
+        generate(db.engine, companies=args.companies, jobs=args.jobs, seekers=args.seekers,
+                 applications=args.applications)
+        print(f'data: {time.perf_counter() - start:.1f}s (with incremental rollups)')
+
+        company_id = db.session.execute(
+            select(JobStats.company_id).group_by(JobStats.company_id)
+            .order_by(func.sum(JobStats.applications).desc()).limit(1)
+        ).scalar()
+
+        def from_applications():
+            per_job = db.session.execute(
+                select(Application.job_id, func.count(),
+                       *(func.sum(case((Application.status == status, 1), else_=0)) for status in STATUS_COLUMNS))
+                .join(Job).where(Job.company_id == company_id).group_by(Application.job_id)
+            ).all()
+            daily = db.session.execute(
+                select(func.date(Application.applied_at), func.count())
+                .join(Job).where(Job.company_id == company_id)
+                .group_by(func.date(Application.applied_at))
+            ).all()
+            return sum(row[1] for row in per_job), len(daily)
+
+        def from_rollups():
+            stats = company_job_stats(company_id)
+            return sum(s.applications for s in stats.values()), daily_applications(company_id)
+
+        (total, _), scan = timed(from_applications, args.repeat)
+        (rolled, _), rollup = timed(from_rollups, args.repeat)
+        print(f'company {company_id}: {total:,} applications (rollups: {rolled:,})')
+        print(f'GROUP BY applications p50: {scan * 1000:.1f}ms')
+        print(f'rollups p50: {rollup * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
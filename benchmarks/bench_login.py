@@ -0,0 +1,67 @@
+"""قياس سرعة التحقق من كلمات المرور لكل إعداد تجزئة
+
+يطبع عدد عمليات الدخول في الثانية لكل نواة، والإنتاجية عبر المجمع المحدود،
+لاختيار قيمة PASSWORD_HASH_METHOD المناسبة لعتاد الخادم:
+
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --method scrypt:32768:8:1 --seconds 5
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash, check_password_hash  # noqa: E402
+
+from passwords import verify_password  # noqa: E402
+
+METHODS = [
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+]
+PASSWORD = 'كلمة-مرور-تجريبية-123'
+
+
+def _rate(check, seconds):
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        check()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def bench_method(method, seconds, threads):
+    stored = generate_password_hash(PASSWORD, method=method)
+    per_core = _rate(lambda: check_password_hash(stored, PASSWORD), seconds)
+
+    # عدة خيوط تتنافس على المجمع المحدود كما في موجة دخول حقيقية
+    with ThreadPoolExecutor(max_workers=threads) as clients:
+        start = time.perf_counter()
+        futures = [clients.submit(_rate, lambda: verify_password(stored, PASSWORD), seconds)
+                   for _ in range(threads)]
+        pooled = sum(f.result() for f in futures)
+        elapsed = time.perf_counter() - start
+    return per_core, pooled, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', action='append', help='إعداد تجزئة (يمكن تكراره)')
+    parser.add_argument('--seconds', type=float, default=2.0, help='مدة القياس لكل إعداد')
+    parser.add_argument('--threads', type=int, default=(os.cpu_count() or 1) * 2,
+                        help='عدد الطلبات المتزامنة على المجمع')
+    args = parser.parse_args()
+
+    print(f'{"method":<24} {"logins/s/core":>14} {"ms/login":>9} {"pooled logins/s":>16}')
+    for method in args.method or METHODS:
+        per_core, pooled, _ = bench_method(method, args.seconds, args.threads)
+        print(f'{method:<24} {per_core:>14.1f} {1000 / per_core:>9.1f} {pooled:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
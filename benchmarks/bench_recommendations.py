@@ -0,0 +1,64 @@
+"""قياس بناء مصفوفة الوظائف المقترحة وزمن حساب أعلى k وظيفة دون قاعدة بيانات
+
+النصوص من مولّد البيانات التجريبية نفسه (synthetic.py):
+
+    python benchmarks/bench_recommendations.py --jobs 200000 --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import JobMatrix  # noqa: E402
+from synthetic import CITIES, _jobs  # noqa: E402
+
+
+def job_rows(rng, start_id, count):
+    for job in _jobs(rng, start_id, count, (1, 100), datetime.utcnow()):
+        yield (job['job_id'], 0, job['city'], job['category_name'], job['title'],
+               job['description'], job['requirements'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--applied', type=int, default=5, help='عدد الوظائف في ملف كل باحث')
+    parser.add_argument('--limit', type=int, default=6)
+    parser.add_argument('--added', type=int, default=1000, help='وظائف تُنشر بعد البناء (تحديث تدريجي)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    rows = list(job_rows(rng, 1, args.jobs))
+    matrix = JobMatrix.build(rows)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = matrix.update(list(job_rows(rng, args.jobs + 1, args.added)))
+    refresh = time.perf_counter() - start
+
+    timings = []
+    for _ in range(args.queries):
+        applied = rng.sample(rows, args.applied)
+        start = time.perf_counter()
+        terms, weights = matrix.profile([row[3:] for row in applied])
+        matrix.top(terms, weights, city=rng.choice(CITIES), exclude={row[0] for row in applied},
+                   limit=args.limit)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    print(f'jobs: {matrix.size}, terms: {len(matrix.vocabulary)}, '
+          f'matrix: {matrix.nbytes / 1024 / 1024:.1f} MB')
+    print(f'build: {build:.1f}s, incremental +{args.added} jobs: {refresh * 1000:.0f}ms')
+    for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+        print(f'top-{args.limit} {label}: {timings[int(fraction * (len(timings) - 1))] * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""قياس زمن استجابة المسارات الرئيسية وإنتاجيتها بتزامن ثابت
+
+يعمل على خادم قائم (--url) أو داخل العملية نفسها عبر عميل الاختبار في Flask (--in-process).
+النتائج قابلة للحفظ والمقارنة بين التشغيلات:
+
+    flask --app app generate-data --jobs 200000 --seekers 1000000 --applications 10000000
+    gunicorn -w 4 --preload 'app:create_app()' &
+    python benchmarks/bench_routes.py --url http://127.0.0.1:8000 --save before.json
+    python benchmarks/bench_routes.py --url http://127.0.0.1:8000 --compare before.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (الاسم، الوزن، دالة تبني المسار من قائمة معرّفات الوظائف والمولّد العشوائي)
+SCENARIOS = [
+    ('index', 4, lambda ids, rng: '/'),
+    ('search_city', 3, lambda ids, rng: '/search?' + urllib.parse.urlencode({'city': rng.choice(['نجران', 'الرياض', 'جدة'])})),
+    ('search_keyword', 3, lambda ids, rng: '/search?' + urllib.parse.urlencode({'q': rng.choice(['مطور', 'محاسب', 'تسويق'])})),
+    ('job_detail', 4, lambda ids, rng: f'/job/{rng.choice(ids)}'),
+    ('api_jobs', 2, lambda ids, rng: '/api/v1/jobs'),
+    ('api_facets', 1, lambda ids, rng: '/api/v1/facets'),
+]
+# تتطلب تسجيل دخول شركة (--company)
+COMPANY_SCENARIOS = [
+    ('company_dashboard', 2, lambda ids, rng: '/company/dashboard'),
+]
+
+
+class HttpClient:
+    """اتصال HTTP دائم لكل خيط مع الاحتفاظ بكوكي الجلسة"""
+
+    def __init__(self, base_url):
+        parts = urllib.parse.urlsplit(base_url)
+        connection = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection(parts.netloc, timeout=30)
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        if body is not None:
+            body = urllib.parse.urlencode(body)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.connection.request(method, urllib.parse.quote(path, safe='/?=&%'), body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, data
+
+
+class InProcessClient:
+    """عميل الاختبار في Flask؛ يقيس زمن التطبيق وقاعدة البيانات دون الشبكة"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, data=body)
+        return response.status_code, response.get_data()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run(make_client, scenarios, job_ids, concurrency, requests, warmup, seed, login=None):
+    names = [name for name, _, _ in scenarios]
+    weights = [weight for _, weight, _ in scenarios]
+    builders = {name: build for name, _, build in scenarios}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    counter = iter(range(warmup + requests))
+
+    def worker(worker_id):
+        client = make_client()
+        if login:
+            email, password = login
+            client.request('POST', '/login', {'user_type': 'company', 'email': email, 'password': password})
+        # كل خيط بمولّد ثابت البذرة حتى تتكرر نفس الطلبات في كل تشغيل
+        rng = random.Random(seed + worker_id)
+        while True:
+            with lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            status, _ = client.request('GET', builders[name](job_ids, rng))
+            elapsed = time.perf_counter() - start
+            if number < warmup:
+                continue
+            with lock:
+                latencies[name].append(elapsed)
+                if status >= 400:
+                    errors[name] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    results = {}
+    everything = []
+    for name in names:
+        values = sorted(latencies[name])
+        everything.extend(values)
+        results[name] = summarize(values, errors[name])
+    results['all'] = summarize(sorted(everything), sum(errors.values()))
+    results['all']['throughput'] = len(everything) / wall
+    return results
+
+
+def summarize(values, error_count):
+    return {
+        'requests': len(values),
+        'errors': error_count,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+    }
+
+
+def print_results(results, baseline=None):
+    print(f'{"route":<20} {"n":>7} {"err":>5} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for name, row in results.items():
+        line = (f'{name:<20} {row["requests"]:>7} {row["errors"]:>5} '
+                f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f}')
+        if baseline and name in baseline:
+            before = baseline[name]['p95_ms']
+            if before:
+                line += f'   p95 {100 * (row["p95_ms"] - before) / before:+.1f}%'
+        print(line)
+    throughput = results['all']['throughput']
+    line = f'throughput: {throughput:.1f} req/s'
+    if baseline and baseline.get('all', {}).get('throughput'):
+        before = baseline['all']['throughput']
+        line += f' ({100 * (throughput - before) / before:+.1f}%)'
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='عنوان خادم قائم، مثل http://127.0.0.1:8000')
+    target.add_argument('--in-process', action='store_true', help='تشغيل التطبيق داخل هذه العملية')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--company', help='EMAIL:PASSWORD لإضافة لوحة الشركة للسيناريوهات')
+    parser.add_argument('--save', help='حفظ النتائج في ملف JSON')
+    parser.add_argument('--compare', help='مقارنة بنتائج محفوظة سابقاً')
+    args = parser.parse_args()
+
+    if args.in_process:
+        from app import create_app
+        app = create_app()
+        make_client = lambda: InProcessClient(app)  # noqa: E731
+    else:
+        make_client = lambda: HttpClient(args.url)  # noqa: E731
+
+    # معرّفات وظائف منشورة حقيقية لصفحة التفاصيل
+    status, body = make_client().request('GET', '/api/v1/jobs?per_page=50')
+    job_ids = [job['job_id'] for job in json.loads(body)['jobs']] if status == 200 else []
+    if not job_ids:
+        parser.error('لا توجد وظائف منشورة؛ شغّل flask generate-data أولاً')
+
+    scenarios = SCENARIOS
+    login = None
+    if args.company:
+        login = tuple(args.company.split(':', 1))
+        scenarios = SCENARIOS + COMPANY_SCENARIOS
+
+    results = run(make_client, scenarios, job_ids, args.concurrency, args.requests,
+                  args.warmup, args.seed, login)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
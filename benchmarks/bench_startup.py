@@ -0,0 +1,117 @@
+"""قياس زمن بدء التشغيل: الاستيراد وإنشاء التطبيق وأول طلب، وإعادة تشغيل العامل بعد fork
+
+كل قياس في عملية Python جديدة حتى لا تؤثر الوحدات المحمّلة مسبقاً على النتيجة:
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --database-url postgresql://... --save startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# الطلب الأول: مسار JSON لا يحتاج قوالب ويلمس قاعدة البيانات
+FIRST_REQUEST = '/api/v1/facets'
+
+COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.create_app()
+created = time.perf_counter()
+response = application.test_client().get(sys.argv[1])
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'create_app_ms': (created - imported) * 1000,
+                  'first_request_ms': (done - created) * 1000, 'total_ms': (done - start) * 1000}))
+"""
+
+# مثل gunicorn --preload: التطبيق في العملية الأم، وكل عامل جديد يبدأ من fork
+RESPAWN = """
+import json, os, sys, time
+from app import create_app
+application = create_app()
+application.test_client().get(sys.argv[1])
+samples = []
+for _ in range(int(sys.argv[2])):
+    read_fd, write_fd = os.pipe()
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = application.test_client().get(sys.argv[1]).status_code
+        os.write(write_fd, str(status).encode())
+        os._exit(0)
+    os.close(write_fd)
+    status = os.read(read_fd, 16)
+    samples.append((time.perf_counter() - start) * 1000)
+    os.waitpid(pid, 0)
+    os.close(read_fd)
+    assert status == b'200', status
+print(json.dumps(samples))
+"""
+
+PREPARE = """
+from app import create_app, db
+from migrations import upgrade
+with create_app().app_context():
+    db.create_all()
+    upgrade(db.engine)
+"""
+
+
+def run_python(code, env, *args):
+    result = subprocess.run([sys.executable, '-c', code, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='عدد عمليات البدء البارد')
+    parser.add_argument('--forks', type=int, default=20, help='عدد العمال المعاد تشغيلهم')
+    parser.add_argument('--database-url', help='قاعدة قائمة؛ بدونها تُنشأ قاعدة SQLite مؤقتة')
+    parser.add_argument('--save', help='حفظ النتائج في ملف JSON')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    else:
+        directory = tempfile.mkdtemp()
+        env['DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "startup.db")}'
+        subprocess.run([sys.executable, '-c', PREPARE], cwd=ROOT, env=env, check=True)
+
+    cold = [run_python(COLD_START, env, FIRST_REQUEST) for _ in range(args.runs)]
+    respawn = run_python(RESPAWN, env, FIRST_REQUEST, str(args.forks))
+
+    results = {name: median([run[name] for run in cold])
+               for name in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms')}
+    results['respawn_ms'] = median(respawn)
+    results['respawn_max_ms'] = max(respawn)
+
+    print(f'{"cold start (median of " + str(args.runs) + ")":<32}')
+    for name in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms'):
+        print(f'  {name:<28} {results[name]:>9.1f}')
+    print(f'{"worker respawn (" + str(args.forks) + " forks)":<32}')
+    print(f'  {"fork_to_first_response_ms":<28} {results["respawn_ms"]:>9.1f}')
+    print(f'  {"max_ms":<28} {results["respawn_max_ms"]:>9.1f}')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
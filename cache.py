@@ -0,0 +1,102 @@
+from functools import lru_cache
+
+from sqlalchemy import event, inspect, select, func, text
+
+from models import db, Job, CacheVersion
+
+# ==================== أرقام الإصدارات ====================
+
+# إصدار الوظائف المنشورة: يتغير عند نشر أو إخفاء وظيفة أو تعديل أي حقل في وظيفة منشورة
+# (يُستخدم لفلاتر الصفحة الرئيسية ولوسوم ETag في واجهة JSON)
+PUBLISHED_JOBS = 'published_jobs'
+
+
+def get_version(name):
+    """قراءة رقم الإصدار الحالي من قاعدة البيانات (مشترك بين كل العمليات)"""
+    version = db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar()
+    return version or 0
+
+
+_BUMP = text(
+    "INSERT INTO cache_versions (name, version) VALUES (:name, 1) "
+    "ON CONFLICT (name) DO UPDATE SET version = cache_versions.version + 1"
+)
+
+
+def bump_version(conn, name):
+    """زيادة رقم الإصدار داخل نفس معاملة التغيير
+
+    عبارة واحدة: أول زيادة لاسم جديد من معاملتين معاً لا تفشل إحداهما بتكرار المفتاح.
+    """
+    conn.execute(_BUMP, {'name': name})
+
+
+# أعمدة الجدول فقط؛ إضافة طلب تقديم تغير علاقة applications ولا تغير ما يظهر للزوار
+_JOB_COLUMNS = tuple(attr.key for attr in inspect(Job).column_attrs)
+
+
+def _published_changed(job):
+    """هل يغير تعديل هذه الوظيفة ما يظهر في قوائم الوظائف المنشورة؟"""
+    state = inspect(job)
+    status = state.attrs.status.history
+    if status.has_changes():
+        # إذا لم تكن القيمة السابقة محمّلة نفترض أن التغيير يؤثر
+        return not status.deleted or 'Published' in (*status.added, *status.deleted)
+    return job.status == 'Published' and any(
+        state.attrs[field].history.has_changes() for field in _JOB_COLUMNS
+    )
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_published_jobs(session, flush_context):
+    added_or_removed = [
+        job for job in (*session.new, *session.deleted)
+        if isinstance(job, Job) and job.status == 'Published'
+    ]
+    modified = [
+        job for job in session.dirty
+        if isinstance(job, Job) and _published_changed(job)
+    ]
+    if added_or_removed or modified:
+        bump_version(session.connection(), PUBLISHED_JOBS)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_job_revisions(session, flush_context, instances):
+    """زيادة رقم مراجعة كل وظيفة تغير أحد أعمدتها؛ يكفي هذا لإبطال صفحتها المخزنة"""
+    for job in session.dirty:
+        if isinstance(job, Job) and session.is_modified(job, include_collections=False):
+            job.revision = Job.revision + 1
+
+
+# ==================== فلاتر الصفحة الرئيسية ====================
+
+@lru_cache(maxsize=4)
+def _published_facets(database, version):
+    # database جزء من المفتاح فقط: تطبيقان في نفس العملية بقاعدتين مختلفتين قد يتفق رقم إصدارهما
+    def counts(column):
+        rows = db.session.execute(
+            select(column, func.count())
+            .where(Job.status == 'Published')
+            .group_by(column)
+            .order_by(column)
+        )
+        return tuple((value, count) for value, count in rows)
+
+    cities = counts(Job.city)
+    return {
+        'cities': cities,
+        'categories': counts(Job.category_name),
+        'job_types': counts(Job.job_type),
+        'total': sum(count for _, count in cities),
+    }
+
+
+def published_facets():
+    """المدن والتصنيفات وأنواع الدوام مع عدد الوظائف المنشورة لكل منها
+
+    تُحسب مرة واحدة لكل قاعدة وإصدار في كل عملية، ويكفي بعدها قراءة رقم الإصدار.
+    """
+    return _published_facets(str(db.engine.url), get_version(PUBLISHED_JOBS))
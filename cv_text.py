@@ -0,0 +1,199 @@
+import multiprocessing
+import random
+import time
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+
+from sqlalchemy import and_, event, or_, select, text, update
+
+from models import db, Application, CvText
+from search import index_cv_text
+from storage import blob_path
+
+# ==================== استخراج النص ====================
+
+# الحد الأقصى لطول النص المخزن لكل سيرة ذاتية
+MAX_TEXT_LENGTH = 200_000
+
+# الحد الأقصى لحجم word/document.xml بعد فك الضغط؛ الملف المرفوع غير موثوق وقد يكون قنبلة ضغط
+MAX_DOCX_XML_SIZE = 20 * 1024 * 1024
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class UnsupportedFormat(ValueError):
+    """صيغة لا يمكن استخراج نصها (مثل DOC)؛ إعادة المحاولة لن تنجح أبداً"""
+
+
+def extract_text(path):
+    """استخراج النص من ملف PDF أو DOCX"""
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension == 'pdf':
+        return _pdf_text(path)
+    if extension == 'docx':
+        return _docx_text(path)
+    raise UnsupportedFormat(f'صيغة غير مدعومة لاستخراج النص: {extension}')
+
+
+def _pdf_text(path):
+    # pypdf مطلوب فقط في عمليات الاستخراج وليس في خادم الويب
+    from pypdf import PdfReader
+
+    parts, length = [], 0
+    for page in PdfReader(path).pages:
+        page_text = page.extract_text() or ''
+        parts.append(page_text)
+        length += len(page_text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+    return '\n'.join(parts)
+
+
+def _docx_text(path):
+    with zipfile.ZipFile(path) as archive:
+        if archive.getinfo('word/document.xml').file_size > MAX_DOCX_XML_SIZE:
+            raise ValueError('محتوى ملف DOCX أكبر من الحد المسموح')
+        # الحجم المعلن في الأرشيف قد يكون مزوراً، فالقراءة نفسها محدودة أيضاً
+        with archive.open('word/document.xml') as document:
+            data = document.read(MAX_DOCX_XML_SIZE + 1)
+        if len(data) > MAX_DOCX_XML_SIZE:
+            raise ValueError('محتوى ملف DOCX أكبر من الحد المسموح')
+        root = ElementTree.fromstring(data)
+    return '\n'.join(
+        ''.join(node.text or '' for node in paragraph.iter(_WORD_NS + 't'))
+        for paragraph in root.iter(_WORD_NS + 'p')
+    )
+
+
+# ==================== الطابور ====================
+
+MAX_ATTEMPTS = 3
+CLAIM_BATCH_SIZE = 10
+# المهمة المحجوزة أطول من هذا تعتبر متروكة (توقف العامل مثلاً) وتُعاد للطابور
+STALE_CLAIM = timedelta(minutes=10)
+# التأخير بعد أول محاولة فاشلة، ويتضاعف مع كل محاولة: الخلل العابر (ملف مقفل مثلاً) يزول غالباً
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(minutes=30)
+
+
+def retry_delay(attempts):
+    """تأخير أسي مع عشوائية حتى لا تعود المهام الفاشلة معاً في اللحظة نفسها"""
+    delay = min(RETRY_MAX, RETRY_BASE * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def enqueue(conn, names):
+    """إضافة ملفات إلى طابور الاستخراج (الملف المستخرج مسبقاً لا يُضاف مرة أخرى)"""
+    params = [{'name': name} for name in names]
+    if params:
+        conn.execute(text(
+            "INSERT INTO cv_texts (name, status, attempts, created_at) "
+            "VALUES (:name, 'Pending', 0, CURRENT_TIMESTAMP) ON CONFLICT (name) DO NOTHING"
+        ), params)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _enqueue_new_cvs(session, flush_context):
+    """الإضافة للطابور داخل معاملة التقديم نفسها حتى لا تضيع مهمة عند إعادة التشغيل"""
+    names = {a.cv_filename for a in session.new if isinstance(a, Application) and a.cv_filename}
+    if names:
+        enqueue(session.connection(), sorted(names))
+
+
+def claim_batch(worker_id, limit=CLAIM_BATCH_SIZE):
+    """حجز دفعة من المهام لهذا العامل وإرجاعها كقائمة (id, name)"""
+    now = datetime.utcnow()
+    stale = and_(CvText.status == 'Processing', CvText.claimed_at < now - STALE_CLAIM)
+    # توقف العامل في المحاولة الأخيرة: المهمة تنتهي بالفشل بدلاً من البقاء محجوزة للأبد
+    db.session.execute(
+        update(CvText)
+        .where(stale, CvText.attempts >= MAX_ATTEMPTS)
+        .values(status='Failed', claimed_by=None, error='توقف العامل أثناء المعالجة')
+        .execution_options(synchronize_session=False)
+    )
+    claimable = or_(
+        and_(CvText.status == 'Pending',
+             or_(CvText.next_attempt_at.is_(None), CvText.next_attempt_at <= now)),
+        and_(stale, CvText.attempts < MAX_ATTEMPTS),
+    )
+    ids = select(CvText.id).where(claimable).order_by(CvText.id).limit(limit)
+    if db.engine.dialect.name == 'postgresql':
+        ids = ids.with_for_update(skip_locked=True)
+
+    db.session.execute(
+        update(CvText)
+        .where(CvText.id.in_(ids), claimable)
+        .values(status='Processing', claimed_by=worker_id, claimed_at=now,
+                attempts=CvText.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return db.session.execute(
+        select(CvText.id, CvText.name, CvText.attempts)
+        .where(CvText.claimed_by == worker_id, CvText.status == 'Processing')
+    ).all()
+
+
+def process_task(task, upload_folder):
+    """استخراج نص ملف واحد وحفظه في الفهرس"""
+    cv_id, name, attempts = task
+    try:
+        content = extract_text(blob_path(upload_folder, name))[:MAX_TEXT_LENGTH]
+    except Exception as error:
+        values = {'status': 'Failed', 'claimed_by': None, 'error': str(error)[:255]}
+        if not isinstance(error, UnsupportedFormat) and attempts < MAX_ATTEMPTS:
+            values.update(status='Pending', next_attempt_at=datetime.utcnow() + retry_delay(attempts))
+        db.session.execute(update(CvText).where(CvText.id == cv_id).values(**values))
+        db.session.commit()
+        return False
+
+    db.session.execute(
+        update(CvText).where(CvText.id == cv_id)
+        .values(status='Done', claimed_by=None, content=content, error=None)
+    )
+    index_cv_text(db.session.connection(), cv_id, content)
+    db.session.commit()
+    return True
+
+
+# ==================== العمال ====================
+
+def run_worker(app, poll_interval=2.0, stop_when_idle=False):
+    """حلقة عامل واحد: يحجز دفعة، يعالجها، وينتظر عند فراغ الطابور"""
+    worker_id = str(uuid.uuid4())
+    with app.app_context():
+        upload_folder = app.config['UPLOAD_FOLDER']
+        while True:
+            tasks = claim_batch(worker_id)
+            if not tasks:
+                if stop_when_idle:
+                    return
+                time.sleep(poll_interval)
+                continue
+            for task in tasks:
+                process_task(task, upload_folder)
+
+
+def _worker_process(poll_interval, stop_when_idle):
+    from app import create_app
+    run_worker(create_app(), poll_interval, stop_when_idle)
+
+
+def run_workers(app, processes=1, poll_interval=2.0, stop_when_idle=False):
+    """تشغيل عدة عمليات مستقلة؛ الإنتاجية تزيد مع عددها لأن الحجز يتم في قاعدة البيانات"""
+    if processes <= 1:
+        run_worker(app, poll_interval, stop_when_idle)
+        return
+
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=_worker_process, args=(poll_interval, stop_when_idle))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
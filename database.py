@@ -0,0 +1,105 @@
+import os
+import weakref
+from functools import wraps
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import make_url
+
+# ==================== إعدادات محرك قاعدة البيانات ====================
+
+REPLICA = 'replica'
+
+# المحركات المنشأة في هذه العملية؛ تُفصل اتصالاتها في العملية الابنة بعد fork
+_engines = weakref.WeakSet()
+
+
+def _dispose_after_fork():
+    # مع gunicorn --preload يُنشأ التطبيق في العملية الأم، ولا يجوز أن يتشارك
+    # العمال اتصالاً مفتوحاً ورثوه منها؛ close=False يترك الاتصال للأم كما هو
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def engine_options(uri, config):
+    """خيارات المحرك حسب نوع القاعدة: SQLite ملف واحد، والقواعد الأخرى مجمع اتصالات"""
+    if make_url(uri).get_backend_name() == 'sqlite':
+        return {}
+
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        # اكتشاف الاتصالات المقطوعة (إعادة تشغيل القاعدة أو انتهاء المهلة) قبل استخدامها
+        'pool_pre_ping': True,
+    }
+    timeout = config['DB_STATEMENT_TIMEOUT_MS']
+    if timeout and make_url(uri).get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
+
+def _sqlite_pragmas(config):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: القراءة لا تنتظر الكتابة، فلا يحجب apply_job صفحات الزوار
+        cursor.execute('PRAGMA journal_mode=WAL')
+        # آمن مع WAL؛ قد تضيع آخر معاملة عند انقطاع الكهرباء فقط، ولا تتلف القاعدة
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+        cursor.close()
+    return set_pragmas
+
+
+def init_engines(app, db):
+    """ضبط خيارات المحرك والنسخة المقروءة ثم ربط قاعدة البيانات بالتطبيق"""
+    config = app.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config['SQLALCHEMY_DATABASE_URI'], config)
+    if config.get('DATABASE_REPLICA_URL'):
+        config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA] = {
+            'url': config['DATABASE_REPLICA_URL'],
+            **engine_options(config['DATABASE_REPLICA_URL'], config),
+        }
+
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _engines.add(engine)
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragmas(config))
+
+
+# ==================== توجيه القراءة إلى النسخة المقروءة ====================
+
+class RoutingSession(Session):
+    """جلسة توجه استعلامات القراءة في المسارات المعلّمة بـ read_replica إلى النسخة المقروءة
+
+    الكتابة وكل ما يحدث أثناء flush يذهب دائماً إلى القاعدة الأساسية.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get('use_replica')
+                and REPLICA in self._db.engines
+                and not isinstance(clause, (Insert, Update, Delete))):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """تعليم مسار للقراءة فقط؛ يقرأ من DATABASE_REPLICA_URL إن وُجد
+
+    النسخة المقروءة قد تتأخر قليلاً عن الأساسية، فلا يُستخدم إلا في صفحات الزوار العامة.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
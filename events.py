@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import delete, event, func, insert, inspect, select
+
+from models import db, Job, Application, Event
+
+# ==================== كتابة الأحداث مع التغيير ====================
+
+SEEKER = 'seeker'
+COMPANY = 'company'
+
+APPLICATION_STATUS = 'application_status'
+NEW_APPLICATION = 'new_application'
+
+
+def _event(audience, audience_id, kind, payload, now):
+    return {'audience': audience, 'audience_id': audience_id, 'kind': kind,
+            'payload': json.dumps(payload, ensure_ascii=False), 'created_at': now}
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_application_events(session, flush_context):
+    """طلب جديد يصل إلى الشركة، وتغيير حالة الطلب يصل إلى الباحث، في نفس المعاملة"""
+    new = [a for a in session.new if isinstance(a, Application)]
+    changed = [
+        a for a in session.dirty
+        if isinstance(a, Application) and inspect(a).attrs.status.history.has_changes()
+    ]
+    if not new and not changed:
+        return
+
+    conn = session.connection()
+    now = datetime.utcnow()
+    rows = [
+        _event(SEEKER, a.seeker_id, APPLICATION_STATUS,
+               {'application_id': a.application_id, 'job_id': a.job_id, 'status': a.status}, now)
+        for a in changed
+    ]
+    if new:
+        companies = dict(conn.execute(
+            select(Job.job_id, Job.company_id).where(Job.job_id.in_({a.job_id for a in new}))
+        ).all())
+        rows += [
+            _event(COMPANY, companies[a.job_id], NEW_APPLICATION,
+                   {'application_id': a.application_id, 'job_id': a.job_id}, now)
+            for a in new if a.job_id in companies
+        ]
+    if rows:
+        conn.execute(insert(Event.__table__), rows)
+
+
+def latest_event_id(audience, audience_id):
+    """آخر رقم حدث للمستخدم؛ تبدأ منه لوحة التحكم حتى لا تُعاد الأحداث القديمة
+
+    اتصال قصير لا جلسة الطلب: مسار البث يُبقي سياق التطبيق (والجلسة) حياً طوال البث.
+    """
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(func.max(Event.id)).where(Event.audience == audience, Event.audience_id == audience_id)
+        ).scalar() or 0
+
+
+def prune_events(engine, older_than_days):
+    """حذف الأحداث الأقدم من المدة المحددة؛ المتصفح المنقطع أطول منها يعيد تحميل الصفحة"""
+    before = datetime.utcnow() - timedelta(days=older_than_days)
+    with engine.begin() as conn:
+        return conn.execute(delete(Event).where(Event.created_at < before)).rowcount
+
+
+# ==================== بث الأحداث (Server-Sent Events) ====================
+
+# أقصى عدد أحداث في كل قراءة من القاعدة
+FETCH_LIMIT = 100
+
+
+def _format(row):
+    return f'id: {row.id}\nevent: {row.kind}\ndata: {row.payload}\n\n'
+
+
+def event_stream(audience, audience_id, last_id):
+    """استجابة SSE بأحداث المستخدم بعد last_id، أو 503 إذا امتلأت اتصالات هذه العملية
+
+    كل اتصال يشغل خيطاً كاملاً في العامل، فعدد الاتصالات محدود بـ EVENTS_MAX_CONNECTIONS
+    والاتصال يُغلق بعد EVENTS_MAX_SECONDS ليعيد المتصفح الاتصال من Last-Event-ID
+    (ربما بعامل آخر أقل انشغالاً). الاتصال بالقاعدة يُعاد للمجمع بين القراءات.
+    """
+    config = current_app.config
+    slots = current_app.extensions['events']
+    if not slots.acquire(blocking=False):
+        return Response('', status=503, headers={'Retry-After': str(config['EVENTS_RETRY_SECONDS'])})
+
+    query = (
+        select(Event.id, Event.kind, Event.payload)
+        .where(Event.audience == audience, Event.audience_id == audience_id)
+        .order_by(Event.id)
+        .limit(FETCH_LIMIT)
+    )
+
+    def generate(last_id):
+        deadline = time.monotonic() + config['EVENTS_MAX_SECONDS']
+        last_write = time.monotonic()
+        yield f"retry: {config['EVENTS_RETRY_SECONDS'] * 1000}\n\n"
+        while time.monotonic() < deadline:
+            with db.engine.connect() as conn:
+                rows = conn.execute(query.where(Event.id > last_id)).all()
+            for row in rows:
+                yield _format(row)
+                last_id = row.id
+            if rows:
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= config['EVENTS_HEARTBEAT_SECONDS']:
+                # تعليق SSE يمنع الخوادم الوسيطة من إغلاق الاتصال الخامل
+                yield ': keepalive\n\n'
+                last_write = time.monotonic()
+            if len(rows) < FETCH_LIMIT:
+                time.sleep(config['EVENTS_POLL_INTERVAL'])
+
+    # stream_with_context يُبقي سياق التطبيق حتى نهاية البث، فتُعاد الآن أي قراءة سابقة
+    # في الطلب إلى المجمع بدلاً من بقاء اتصالها محجوزاً (idle in transaction) طوال البث
+    db.session.remove()
+    response = Response(stream_with_context(generate(last_id)), mimetype='text/event-stream')
+    response.call_on_close(slots.release)
+    response.headers['Cache-Control'] = 'no-store'
+    # nginx: تمرير الأحداث فوراً دون تجميعها في المخزن المؤقت
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def init_events(app):
+    """حد اتصالات SSE المفتوحة في كل عملية"""
+    app.extensions['events'] = threading.BoundedSemaphore(app.config.get('EVENTS_MAX_CONNECTIONS', 4))
@@ -0,0 +1,74 @@
+import csv
+import io
+import re
+
+from flask import url_for
+
+from models import db, Job, JobSeeker, Application
+
+# عدد الصفوف المقروءة من قاعدة البيانات في كل دفعة
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_HEADER = [
+    'رقم الطلب', 'الوظيفة', 'اسم المتقدم', 'البريد الإلكتروني', 'الجوال', 'المدينة',
+    'الحالة', 'تاريخ التقديم', 'رابط السيرة الذاتية',
+]
+
+# قيم تبدأ بهذه الرموز قد ينفذها Excel كمعادلات
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+_NUMBER = re.compile(r'^[+-]?[\d\s]+$')
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) and not _NUMBER.match(value):
+        return "'" + value
+    return value
+
+
+def applicants_query(company_id, job_id=None):
+    """أعمدة المتقدمين فقط (بدون تحميل الكائنات) لوظيفة واحدة أو لكل وظائف الشركة"""
+    stmt = (
+        db.select(
+            Application.application_id, Job.title, JobSeeker.full_name, JobSeeker.email,
+            JobSeeker.phone, JobSeeker.city, Application.status, Application.applied_at,
+            Application.cv_filename,
+        )
+        .join(Job, Application.job_id == Job.job_id)
+        .join(JobSeeker, Application.seeker_id == JobSeeker.seeker_id)
+        .where(Job.company_id == company_id)
+        .order_by(Application.job_id, Application.application_id)
+    )
+    if job_id is not None:
+        stmt = stmt.where(Application.job_id == job_id)
+    return stmt
+
+
+def stream_applicants_csv(stmt):
+    """توليد ملف CSV على دفعات؛ يُرسل العنوان قبل تنفيذ الاستعلام"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    # BOM حتى يتعرف Excel على الترميز UTF-8 للنص العربي
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_HEADER)
+    yield flush()
+
+    rows = db.session.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for chunk in rows.partitions():
+        for (application_id, title, full_name, email, phone, city,
+             status, applied_at, cv_filename) in chunk:
+            cv_url = url_for('main.download_cv', filename=cv_filename, _external=True) if cv_filename else ''
+            writer.writerow([
+                application_id, _cell(title), _cell(full_name), _cell(email), _cell(phone),
+                _cell(city), status, applied_at.strftime('%Y-%m-%d %H:%M') if applied_at else '',
+                cv_url,
+            ])
+        yield flush()
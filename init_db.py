@@ -1,9 +1,12 @@
-from app import app, db
+from app import create_app, db
+from migrations import upgrade
 from models import Admin, Company, Job, JobSeeker, Application
+from search import rebuild_search_index, rebuild_cv_index
 from datetime import datetime
 
 def init_database():
     """تهيئة قاعدة البيانات ببيانات تجريبية"""
+    app = create_app()
     
     with app.app_context():
         # حذف الجداول القديمة
@@ -11,6 +14,11 @@ def init_database():
         
         # إنشاء الجداول الجديدة
         db.create_all()
+        upgrade(db.engine)
+        
+        # تفريغ فهرس البحث من بقايا البيانات القديمة
+        rebuild_search_index(db.engine)
+        rebuild_cv_index(db.engine)
         
         print("✓ تم إنشاء الجداول بنجاح")
         
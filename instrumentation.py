@@ -0,0 +1,284 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import Response, abort, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ==================== عداد استعلامات SQL لكل طلب ====================
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context():
+        g.sql_count = g.get('sql_count', 0) + 1
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'query_start', None)
+    if not has_app_context() or start is None:
+        return
+    elapsed = time.perf_counter() - start
+    g.db_time = g.get('db_time', 0.0) + elapsed
+    # نص الاستعلامات يُجمع فقط عند تفعيل سجل الطلبات البطيئة
+    statements = g.get('sql_statements')
+    if statements is not None:
+        statements.append((elapsed, statement))
+
+
+def query_count():
+    """عدد استعلامات SQL المنفذة في الطلب الحالي"""
+    return g.get('sql_count', 0)
+
+
+# ==================== مقاييس المسارات ====================
+
+# حدود مدرج زمن الاستجابة بالثواني
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# مجموع عدادات العمليات المنتهية، وقفل ضمها
+RETIRED_NAME = 'retired.json'
+RETIRED_LOCK = 'retired.lock'
+
+
+def _empty():
+    return {'requests': {}, 'latency': {}, 'sql': {}, 'db_seconds': {}, 'response_bytes': {}}
+
+
+def _merge(total, snapshot):
+    for name, values in snapshot.items():
+        for key, value in values.items():
+            if isinstance(value, list):
+                current = total[name].setdefault(key, [0] * len(value))
+                total[name][key] = [a + b for a, b in zip(current, value)]
+            else:
+                total[name][key] = total[name].get(key, 0) + value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # العملية موجودة لكنها لمستخدم آخر
+        return True
+    return True
+
+
+class Metrics:
+    """مقاييس هذه العملية؛ مع METRICS_DIR تُكتب لقطة لكل عملية في ملف وتُجمع في /metrics
+
+    الملف باسم رقم العملية، وإذا وُجد ملف سابق بنفس الرقم (عامل قديم أُعيد تشغيله)
+    يُكمل العد منه حتى لا تنقص العدادات. ملفات العمليات المنتهية تُضم إلى ملف واحد
+    عند التجميع، فلا تتراكم الملفات مع كل إعادة تشغيل للعمال.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_process(self):
+        # بعد fork تبدأ كل عملية بعداداتها الخاصة
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._last_flush = 0.0
+        self.data = _empty()
+        if self.directory and os.path.exists(self._path()):
+            with open(self._path()) as f:
+                self.data = json.load(f)
+
+    def _path(self):
+        return os.path.join(self.directory, f'{self._pid}.json')
+
+    def record(self, endpoint, method, status, duration, sql_count, db_time, size):
+        with self._lock:
+            self._ensure_process()
+            data = self.data
+            key = f'{endpoint}\t{method}\t{status}'
+            data['requests'][key] = data['requests'].get(key, 0) + 1
+
+            latency = data['latency'].setdefault(f'{endpoint}\t{method}', [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    latency[i] += 1
+            latency[-2] += duration
+            latency[-1] += 1
+
+            for name, value in (('sql', sql_count), ('db_seconds', db_time), ('response_bytes', size)):
+                data[name][endpoint] = data[name].get(endpoint, 0) + value
+
+            if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _write(self, data, path):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(self.data, self._path())
+        self._last_flush = time.monotonic()
+
+    def _retire_dead(self):
+        """ضم ملفات العمليات المنتهية إلى retired.json وحذفها؛ أرقامها تبقى في المجموع"""
+        dead = [
+            filename for filename in os.listdir(self.directory)
+            if filename.endswith('.json') and filename[:-5].isdigit()
+            and int(filename[:-5]) != os.getpid() and not _pid_alive(int(filename[:-5]))
+        ]
+        if not dead:
+            return
+        retired_path = os.path.join(self.directory, RETIRED_NAME)
+        with open(os.path.join(self.directory, RETIRED_LOCK), 'a') as lock:
+            # عاملان قد يجمعان في نفس اللحظة: القراءة والحذف تحت القفل حتى لا يُضم ملف مرتين
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(retired_path) as f:
+                    retired = json.load(f)
+            except FileNotFoundError:
+                retired = _empty()
+            merged = []
+            for filename in dead:
+                path = os.path.join(self.directory, filename)
+                try:
+                    with open(path) as f:
+                        _merge(retired, json.load(f))
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    pass
+                merged.append(path)
+            if not merged:
+                return
+            self._write(retired, retired_path)
+            for path in merged:
+                os.remove(path)
+
+    def snapshots(self):
+        """لقطات كل العمليات (أو هذه العملية فقط بدون METRICS_DIR)"""
+        with self._lock:
+            self._ensure_process()
+            if not self.directory:
+                return [self.data]
+            self._flush()
+
+        self._retire_dead()
+        result = []
+        with open(os.path.join(self.directory, RETIRED_LOCK), 'a') as lock:
+            # قفل مشترك: لا يُقرأ ملف عملية منتهية ومجموعها في retired.json معاً
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            for filename in os.listdir(self.directory):
+                if filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(self.directory, filename)) as f:
+                            result.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+        return result
+
+    def aggregate(self):
+        total = _empty()
+        for snapshot in self.snapshots():
+            _merge(total, snapshot)
+        return total
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_prometheus(total):
+    """تحويل المقاييس المجمعة إلى صيغة Prometheus النصية"""
+    lines = [
+        '# HELP http_requests_total Requests by endpoint, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for key, count in sorted(total['requests'].items()):
+        endpoint, method, status = key.split('\t')
+        lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by endpoint and method.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for key, values in sorted(total['latency'].items()):
+        endpoint, method = key.split('\t')
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            lines.append('http_request_duration_seconds_bucket'
+                         f'{_labels(endpoint=endpoint, method=method, le=bound)} {count}')
+        lines.append('http_request_duration_seconds_bucket'
+                     f'{_labels(endpoint=endpoint, method=method, le="+Inf")} {values[-1]}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method)} {values[-2]}')
+        lines.append(f'http_request_duration_seconds_count{_labels(endpoint=endpoint, method=method)} {values[-1]}')
+
+    for name, metric, help_text in (
+        ('sql', 'http_request_sql_statements_total', 'SQL statements executed by endpoint.'),
+        ('db_seconds', 'http_request_db_seconds_total', 'Time spent in SQL by endpoint.'),
+        ('response_bytes', 'http_response_bytes_total', 'Response body bytes by endpoint.'),
+    ):
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for endpoint, value in sorted(total[name].items()):
+            lines.append(f'{metric}{_labels(endpoint=endpoint)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_instrumentation(app):
+    """قياس كل طلب، ومسار /metrics، وترويسة X-SQL-Count عند تفعيل SQL_COUNT_HEADER
+
+    SLOW_REQUEST_MS يفعّل تسجيل الطلبات الأبطأ من هذه المدة مع استعلاماتها.
+    """
+    metrics = Metrics(app.config.get('METRICS_DIR') or None,
+                      app.config.get('METRICS_FLUSH_INTERVAL', 1.0))
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        if app.config.get('SLOW_REQUEST_MS'):
+            g.sql_statements = []
+
+    @app.after_request
+    def record_request(response):
+        if app.config.get('SQL_COUNT_HEADER'):
+            response.headers['X-SQL-Count'] = str(query_count())
+
+        start = g.get('request_start')
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        metrics.record(endpoint, request.method, response.status_code, duration,
+                       query_count(), g.get('db_time', 0.0), response.content_length or 0)
+
+        slow_ms = app.config.get('SLOW_REQUEST_MS')
+        if slow_ms and duration * 1000 >= slow_ms:
+            statements = '\n'.join(
+                f'  {elapsed * 1000:.1f}ms {statement}' for elapsed, statement in g.sql_statements
+            )
+            app.logger.warning('طلب بطيء %s %s (%s): %.0fms، %d استعلام، %.0fms في قاعدة البيانات\n%s',
+                               request.method, request.full_path, endpoint, duration * 1000,
+                               query_count(), g.get('db_time', 0.0) * 1000, statements)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """مقاييس كل العمليات بصيغة Prometheus"""
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(403)
+        return Response(render_prometheus(metrics.aggregate()),
+                        mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import db, Job
+from search import index_jobs
+
+# ==================== استيراد الوظائف دفعة واحدة ====================
+
+# عدد الصفوف في كل عملية إدراج (executemany) وكل معاملة
+IMPORT_BATCH_SIZE = 1000
+
+JOB_CATEGORIES = {'IT', 'Accounting', 'HR', 'Sales', 'Marketing', 'Design', 'Other'}
+JOB_TYPES = {'Full-time', 'Part-time', 'Internship'}
+
+# الحقول المقبولة في الملف: (الاسم، إلزامي، أقصى طول)
+IMPORT_FIELDS = (
+    ('title', True, Job.title.type.length),
+    ('category_name', True, Job.category_name.type.length),
+    ('description', True, None),
+    ('requirements', True, None),
+    ('city', True, Job.city.type.length),
+    ('job_type', True, Job.job_type.type.length),
+    ('salary', False, Job.salary.type.length),
+)
+
+
+class ImportFormatError(ValueError):
+    """الملف نفسه غير قابل للقراءة (وليس خطأ في صف معين)"""
+    imported = 0
+
+
+def read_rows(file, extension):
+    """قراءة الصفوف من ملف CSV (الصف الأول أسماء الأعمدة) أو JSON (قائمة كائنات)"""
+    if extension == 'csv':
+        # utf-8-sig حتى يُقبل ملف Excel الذي يبدأ بـ BOM
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+        try:
+            yield from csv.DictReader(stream)
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise ImportFormatError(f'تعذرت قراءة ملف CSV: {error}')
+        return
+
+    if extension == 'json':
+        try:
+            data = json.load(file.stream)
+        except (UnicodeDecodeError, ValueError) as error:
+            raise ImportFormatError(f'تعذرت قراءة ملف JSON: {error}')
+        if isinstance(data, dict):
+            data = data.get('jobs')
+        if not isinstance(data, list):
+            raise ImportFormatError('يجب أن يحتوي ملف JSON على قائمة وظائف')
+        yield from data
+        return
+
+    raise ImportFormatError('صيغة الملف غير مدعومة. استخدم CSV أو JSON')
+
+
+def validate_row(row):
+    """إرجاع (القيم، الأخطاء) لصف واحد؛ الأخطاء قاموس اسم الحقل -> الرسالة"""
+    if not isinstance(row, dict):
+        return None, {'row': 'يجب أن يكون الصف كائناً بأسماء الحقول'}
+
+    values, errors = {}, {}
+    for field, required, max_length in IMPORT_FIELDS:
+        value = row.get(field)
+        value = '' if value is None else str(value).strip()
+        if not value:
+            if required:
+                errors[field] = 'حقل إلزامي'
+            values[field] = None
+            continue
+        if max_length and len(value) > max_length:
+            errors[field] = f'يجب ألا يتجاوز {max_length} حرفاً'
+        values[field] = value
+
+    if values['category_name'] and values['category_name'] not in JOB_CATEGORIES:
+        errors['category_name'] = 'تصنيف غير معروف'
+    if values['job_type'] and values['job_type'] not in JOB_TYPES:
+        errors['job_type'] = 'نوع دوام غير معروف'
+    return values, errors
+
+
+def _insert_batch(company_id, batch):
+    """إدراج دفعة في معاملة واحدة وتحديث فهرس البحث
+
+    الإدراج المجمع لا يمر على أحداث الجلسة، لذلك يُحدَّث الفهرس هنا مباشرة.
+    الوظائف المستوردة معلقة حتى يوافق المشرف فلا يتغير إصدار الوظائف المنشورة.
+    """
+    posted_at = datetime.utcnow()
+    params = [
+        dict(values, company_id=company_id, status='Pending', posted_at=posted_at)
+        for values in batch
+    ]
+    conn = db.session.connection()
+    # إرجاع النصوص مع المعرف حتى لا نعتمد على ترتيب صفوف RETURNING؛
+    # طلب الترتيب يجعل SQLite ينفذ صفاً بصف بدلاً من دفعات
+    indexed = conn.execute(
+        insert(Job.__table__).returning(Job.job_id, Job.title, Job.description, Job.requirements),
+        params,
+    ).all()
+    index_jobs(conn, indexed)
+    db.session.commit()
+
+
+def import_jobs(company_id, rows):
+    """استيراد الصفوف الصحيحة على دفعات وإرجاع (عدد المستورد، أخطاء كل صف)
+
+    رقم الصف في تقرير الأخطاء يبدأ من 1 لأول وظيفة في الملف.
+    """
+    imported, errors, batch = 0, [], []
+    try:
+        for number, row in enumerate(rows, start=1):
+            values, row_errors = validate_row(row)
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                continue
+            batch.append(values)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _insert_batch(company_id, batch)
+                imported += len(batch)
+                batch = []
+    except ImportFormatError as error:
+        # الدفعات السابقة حُفظت بالفعل
+        error.imported = imported
+        raise
+
+    if batch:
+        _insert_batch(company_id, batch)
+        imported += len(batch)
+    return imported, errors
@@ -0,0 +1,279 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.schema import CreateTable
+
+from models import (db, Company, Job, Application, CacheVersion, CvBlob, CvText,
+                    ArchivedJob, ArchivedApplication, Event, Notification, JobStats,
+                    CompanyDailyApplications)
+from search import init_search_index, init_cv_index
+from analytics import rebuild_rollups
+
+# ==================== سجل الترحيلات ====================
+
+# (رقم الإصدار، الوصف، الدالة) بترتيب التطبيق
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """تسجيل ترحيل جديد؛ كل ترحيل يُطبَّق مرة واحدة داخل معاملة مستقلة"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+def _create_indexes(conn, *names):
+    """إنشاء فهارس معرّفة في models.py إن لم تكن موجودة"""
+    indexes = {
+        index.name: index
+        for table in db.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+@migration(1, 'فهرس البحث النصي للوظائف')
+def _jobs_search_index(conn):
+    init_search_index(conn)
+
+
+@migration(2, 'فهارس مركبة لاستعلامات القوائم ولوحات التحكم')
+def _hot_path_indexes(conn):
+    _create_indexes(
+        conn,
+        'ix_jobs_status_posted_at',
+        'ix_jobs_status_city_posted_at',
+        'ix_jobs_status_category_posted_at',
+        'ix_jobs_status_type_posted_at',
+        'ix_jobs_company_id',
+        'ix_applications_seeker_id_applied_at',
+    )
+
+
+@migration(3, 'منع التقديم المكرر على نفس الوظيفة')
+def _unique_application(conn):
+    # الإبقاء على أقدم طلب فقط قبل إنشاء القيد
+    conn.execute(text(
+        "DELETE FROM applications WHERE application_id NOT IN ("
+        "SELECT MIN(application_id) FROM applications GROUP BY job_id, seeker_id)"
+    ))
+    _create_indexes(conn, 'uq_applications_job_id_seeker_id')
+
+
+@migration(4, 'جدول أرقام إصدارات الذاكرة المؤقتة')
+def _cache_versions(conn):
+    CacheVersion.__table__.create(conn, checkfirst=True)
+
+
+@migration(5, 'فهرس حالة الشركات لجدول الإشراف')
+def _companies_status_index(conn):
+    _create_indexes(conn, 'ix_companies_status_company_id')
+
+
+@migration(6, 'جدول ملفات السير الذاتية المخزنة حسب المحتوى')
+def _cv_blobs(conn):
+    CvBlob.__table__.create(conn, checkfirst=True)
+
+
+@migration(7, 'فهرس اسم ملف السيرة الذاتية للتحقق من صلاحية التحميل')
+def _cv_filename_index(conn):
+    _create_indexes(conn, 'ix_applications_cv_filename')
+
+
+@migration(8, 'طابور ونص وفهرس السير الذاتية')
+def _cv_texts(conn):
+    CvText.__table__.create(conn, checkfirst=True)
+    init_cv_index(conn)
+    # إضافة الملفات الموجودة إلى طابور الاستخراج
+    conn.execute(text(
+        "INSERT INTO cv_texts (name, status, attempts, created_at) "
+        "SELECT DISTINCT cv_filename, 'Pending', 0, CURRENT_TIMESTAMP FROM applications "
+        "WHERE cv_filename IS NOT NULL "
+        "AND cv_filename NOT IN (SELECT name FROM cv_texts)"
+    ))
+
+
+@migration(9, 'رقم مراجعة الوظيفة لذاكرة الصفحات')
+def _job_revision(conn):
+    if 'revision' not in {column['name'] for column in inspect(conn).get_columns('jobs')}:
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+
+
+@migration(10, 'جداول أرشيف الوظائف والطلبات')
+def _archive_tables(conn):
+    ArchivedJob.__table__.create(conn, checkfirst=True)
+    ArchivedApplication.__table__.create(conn, checkfirst=True)
+
+
+@migration(11, 'جدول أحداث الإشعارات الفورية (SSE)')
+def _events(conn):
+    Event.__table__.create(conn, checkfirst=True)
+
+
+@migration(12, 'صندوق الإشعارات الصادرة')
+def _notification_outbox(conn):
+    Notification.__table__.create(conn, checkfirst=True)
+
+
+@migration(13, 'عدادات الطلبات لكل وظيفة ولكل شركة يومياً')
+def _analytics_rollups(conn):
+    JobStats.__table__.create(conn, checkfirst=True)
+    CompanyDailyApplications.__table__.create(conn, checkfirst=True)
+    rebuild_rollups(conn)
+
+
+def _rebuild_with_autoincrement(conn, table):
+    """SQLite لا يضيف AUTOINCREMENT لجدول موجود: نسخه إلى جدول جديد بتعريف models.py ثم استبداله"""
+    current = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table.name}
+    ).scalar()
+    if 'AUTOINCREMENT' in current.upper():
+        return
+    staging = f'{table.name}_rebuild'
+    ddl = str(CreateTable(table).compile(conn)).strip()
+    conn.execute(text(ddl.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {staging} ', 1)))
+    columns = ', '.join(column.name for column in table.columns)
+    conn.execute(text(f"INSERT INTO {staging} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _reserve_archived_ids(conn, table, column, archive):
+    """بدء العداد بعد أكبر معرّف حي أو مؤرشف حتى لا يأخذ صف جديد معرّف صف في الأرشيف"""
+    highest = max(
+        conn.execute(select(func.max(source.c[column]))).scalar() or 0 for source in (table, archive)
+    )
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {'name': table.name})
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                 {'name': table.name, 'seq': highest})
+
+
+@migration(14, 'عدم إعادة استخدام معرّفات الوظائف والطلبات المؤرشفة في SQLite')
+def _sqlite_autoincrement(conn):
+    # PostgreSQL: التسلسل لا يعيد أي قيمة أصلاً
+    if conn.dialect.name != 'sqlite':
+        return
+    for model, archive, column in ((Job, ArchivedJob, 'job_id'),
+                                   (Application, ArchivedApplication, 'application_id')):
+        _rebuild_with_autoincrement(conn, model.__table__)
+        _reserve_archived_ids(conn, model.__table__, column, archive.__table__)
+
+
+@migration(15, 'تأخير إعادة محاولة استخراج نص السيرة الذاتية')
+def _cv_text_backoff(conn):
+    if 'next_attempt_at' not in {column['name'] for column in inspect(conn).get_columns('cv_texts')}:
+        conn.execute(text("ALTER TABLE cv_texts ADD COLUMN next_attempt_at TIMESTAMP"))
+
+
+# ==================== تطبيق الترحيلات ====================
+
+def applied_versions(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(255) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def upgrade(engine):
+    """تطبيق الترحيلات غير المطبقة على قاعدة بيانات موجودة دون حذف البيانات"""
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+
+    done = []
+    for version, description, func in sorted(MIGRATIONS, key=lambda item: item[0]):
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()},
+            )
+        done.append((version, description))
+    return done
+
+
+# ==================== فحص خطط الاستعلام ====================
+
+def hot_queries():
+    """الاستعلامات الأكثر تكراراً في المسارات بنفس شكلها في app.py"""
+    cursor = (datetime(2000, 1, 1), 1)
+    listing = db.select(Job).where(Job.status == 'Published')
+    latest = [Job.posted_at.desc(), Job.job_id.desc()]
+    after = db.tuple_(Job.posted_at, Job.job_id) < db.tuple_(*cursor)
+
+    return [
+        ('index', listing.order_by(*latest).limit(13)),
+        ('index (cursor)', listing.where(after).order_by(*latest).limit(13)),
+        ('search_jobs city', listing.where(Job.city == 'نجران').order_by(*latest).limit(13)),
+        ('search_jobs category', listing.where(Job.category_name == 'IT').order_by(*latest).limit(13)),
+        ('search_jobs job_type', listing.where(Job.job_type == 'Full-time').order_by(*latest).limit(13)),
+        ('company_dashboard', db.select(Job).where(Job.company_id == 1)),
+        ('job_applicants', db.select(Application).where(Application.job_id == 1)),
+        ('seeker_dashboard', db.select(Application).where(Application.seeker_id == 1)),
+        ('apply_job', db.select(Application).where(
+            Application.job_id == 1, Application.seeker_id == 1)),
+        ('download_cv', db.select(Application.application_id).where(
+            Application.cv_filename == 'cv.pdf', Application.seeker_id == 1)),
+        ('admin_dashboard companies', db.select(Company).where(Company.status == 'Pending')
+            .order_by(Company.company_id.desc()).limit(21)),
+        ('admin_dashboard jobs', db.select(Job).where(Job.status == 'Pending')
+            .order_by(*latest).limit(21)),
+    ]
+
+
+def _explain(conn, statement, parameters):
+    """إعادة خطة التنفيذ كسطور نصية"""
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in rows]
+    rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters)
+    return [row[0] for row in rows]
+
+
+_FULL_SCAN = re.compile(
+    r'^SCAN (TABLE )?(jobs|applications|companies)\b'   # SQLite
+    r'|Seq Scan on (jobs|applications|companies)\b'     # PostgreSQL
+)
+
+
+def _is_full_scan(line):
+    return bool(_FULL_SCAN.search(line.strip()))
+
+
+def check_query_plans(engine):
+    """يعيد قائمة (المسار، سطر الخطة) لكل استعلام يقرأ الجدول كاملاً"""
+    failures = []
+    with engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            # الجداول الصغيرة تجعل المخطط يفضّل القراءة التسلسلية مهما كانت الفهارس
+            conn.exec_driver_sql('SET enable_seqscan = off')
+
+        for route, stmt in hot_queries():
+            captured = []
+
+            def capture(_conn, cursor, statement, parameters, context, executemany):
+                captured.append((statement, parameters))
+
+            event.listen(conn, 'before_cursor_execute', capture)
+            try:
+                conn.execute(stmt).all()
+            finally:
+                event.remove(conn, 'before_cursor_execute', capture)
+
+            for statement, parameters in captured:
+                failures.extend(
+                    (route, line) for line in _explain(conn, statement, parameters)
+                    if _is_full_scan(line)
+                )
+        conn.rollback()
+    return failures
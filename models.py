@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from passwords import hash_password, verify_password
+from database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # جدول المشرفين (Admins)
 class Admin(db.Model):
@@ -14,10 +15,10 @@ class Admin(db.Model):
     password = db.Column(db.String(255), nullable=False)
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
     
     def __repr__(self):
         return f'<Admin {self.full_name}>'
@@ -26,6 +27,10 @@ class Admin(db.Model):
 # جدول الشركات (Companies)
 class Company(db.Model):
     __tablename__ = 'companies'
+    __table_args__ = (
+        # جدول الإشراف في لوحة المشرف مفلتر بالحالة
+        db.Index('ix_companies_status_company_id', 'status', 'company_id'),
+    )
     
     company_id = db.Column(db.Integer, primary_key=True)
     company_name = db.Column(db.String(150), nullable=False)
@@ -41,10 +46,10 @@ class Company(db.Model):
     jobs = db.relationship('Job', backref='company', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
     
     def __repr__(self):
         return f'<Company {self.company_name}>'
@@ -53,6 +58,17 @@ class Company(db.Model):
 # جدول الوظائف (Jobs)
 class Job(db.Model):
     __tablename__ = 'jobs'
+    __table_args__ = (
+        # الصفحة الرئيسية والبحث: الحالة ثم التصفية ثم ترتيب الترقيم (posted_at, job_id)
+        db.Index('ix_jobs_status_posted_at', 'status', 'posted_at', 'job_id'),
+        db.Index('ix_jobs_status_city_posted_at', 'status', 'city', 'posted_at', 'job_id'),
+        db.Index('ix_jobs_status_category_posted_at', 'status', 'category_name', 'posted_at', 'job_id'),
+        db.Index('ix_jobs_status_type_posted_at', 'status', 'job_type', 'posted_at', 'job_id'),
+        # لوحة الشركة
+        db.Index('ix_jobs_company_id', 'company_id'),
+        # SQLite: لا يُعاد استخدام معرّف وظيفة نُقلت إلى الأرشيف
+        {'sqlite_autoincrement': True},
+    )
     
     job_id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.company_id'), nullable=False)
@@ -65,6 +81,8 @@ class Job(db.Model):
     requirements = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(50), default='Pending')  # Pending, Published, Rejected, Hidden
     posted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # يزيد مع كل تعديل على الوظيفة، ويدخل في مفتاح ذاكرة صفحة التفاصيل
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # العلاقات
     applications = db.relationship('Application', backref='job', lazy=True, cascade='all, delete-orphan')
@@ -89,10 +107,10 @@ class JobSeeker(db.Model):
     applications = db.relationship('Application', backref='seeker', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
     
     def __repr__(self):
         return f'<JobSeeker {self.full_name}>'
@@ -101,6 +119,15 @@ class JobSeeker(db.Model):
 # جدول الطلبات (Applications)
 class Application(db.Model):
     __tablename__ = 'applications'
+    __table_args__ = (
+        # منع التقديم المكرر، ويخدم أيضاً عرض المتقدمين على وظيفة
+        db.Index('uq_applications_job_id_seeker_id', 'job_id', 'seeker_id', unique=True),
+        # لوحة الباحث
+        db.Index('ix_applications_seeker_id_applied_at', 'seeker_id', 'applied_at'),
+        # التحقق من صلاحية تحميل السيرة الذاتية
+        db.Index('ix_applications_cv_filename', 'cv_filename'),
+        {'sqlite_autoincrement': True},
+    )
     
     application_id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('jobs.job_id'), nullable=False)
@@ -113,3 +140,186 @@ class Application(db.Model):
     
     def __repr__(self):
         return f'<Application Job:{self.job_id} Seeker:{self.seeker_id}>'
+
+
+# جدول أرقام إصدارات الذاكرة المؤقتة (Cache Versions)
+# يُزاد الرقم مع كل تغيير حتى تعرف كل العمليات (workers) أن نسختها المحلية قديمة
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}:{self.version}>'
+
+
+# جدول ملفات السير الذاتية (CV Blobs)
+# كل ملف يُخزن مرة واحدة باسم بصمته SHA-256، ويُحسب عدد الطلبات التي تشير إليه
+class CvBlob(db.Model):
+    __tablename__ = 'cv_blobs'
+    
+    name = db.Column(db.String(80), primary_key=True)  # <sha256>.<ext> كما في Application.cv_filename
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CvBlob {self.name} refs:{self.refcount}>'
+
+
+# جدول نصوص السير الذاتية (CV Texts)
+# يعمل أيضاً كطابور دائم لاستخراج النص في الخلفية: Pending ثم Processing ثم Done أو Failed
+class CvText(db.Model):
+    __tablename__ = 'cv_texts'
+    __table_args__ = (
+        # سحب المهام المعلقة بالترتيب
+        db.Index('ix_cv_texts_status_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)  # كما في Application.cv_filename
+    status = db.Column(db.String(20), nullable=False, default='Pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claimed_by = db.Column(db.String(36), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)  # NULL: مستحقة فوراً
+    content = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CvText {self.name} {self.status}>'
+
+
+# أرشيف الوظائف (Archived Jobs)
+# الوظائف المرفوضة والمخفية القديمة تُنقل إلى هنا مع طلباتها حتى تبقى الجداول الحية صغيرة
+class ArchivedJob(db.Model):
+    __tablename__ = 'jobs_archive'
+    __table_args__ = (
+        # عرض الأرشيف في لوحة المشرف: الأحدث أرشفة أولاً
+        db.Index('ix_jobs_archive_archived_at', 'archived_at', 'job_id'),
+        db.Index('ix_jobs_archive_company_id', 'company_id'),
+    )
+    
+    # نفس المعرّف في جدول jobs حتى تعود الوظيفة وروابطها كما كانت عند الاستعادة
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.company_id'), nullable=False)
+    category_name = db.Column(db.String(100), nullable=False)
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    city = db.Column(db.String(100), nullable=False)
+    job_type = db.Column(db.String(50), nullable=False)
+    salary = db.Column(db.String(100), nullable=True)
+    requirements = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(50))
+    posted_at = db.Column(db.DateTime)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    company = db.relationship('Company', lazy=True)
+    
+    def __repr__(self):
+        return f'<ArchivedJob {self.title}>'
+
+
+# أرشيف الطلبات (Archived Applications)
+class ArchivedApplication(db.Model):
+    __tablename__ = 'applications_archive'
+    __table_args__ = (
+        db.Index('ix_applications_archive_job_id', 'job_id'),
+    )
+    
+    application_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs_archive.job_id'), nullable=False)
+    seeker_id = db.Column(db.Integer, db.ForeignKey('job_seekers.seeker_id'), nullable=False)
+    cover_letter = db.Column(db.Text, nullable=True)
+    # يبقى محسوباً في cv_blobs.refcount فلا يحذف gc-cvs الملف ما دام الطلب في الأرشيف
+    cv_filename = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(50))
+    internal_notes = db.Column(db.Text, nullable=True)
+    applied_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArchivedApplication Job:{self.job_id} Seeker:{self.seeker_id}>'
+
+
+# جدول الأحداث (Events)
+# يُكتب في نفس معاملة التغيير، وتقرؤه اتصالات SSE بعد آخر رقم استلمه المتصفح
+class Event(db.Model):
+    __tablename__ = 'events'
+    __table_args__ = (
+        # قراءة أحداث مستخدم واحد بعد Last-Event-ID
+        db.Index('ix_events_audience_id', 'audience', 'audience_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    audience = db.Column(db.String(20), nullable=False)  # seeker, company
+    audience_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # application_status, new_application
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Event {self.id} {self.kind} {self.audience}:{self.audience_id}>'
+
+
+# صندوق الإشعارات الصادرة (Notification Outbox)
+# يُكتب في نفس معاملة التغيير، ويرسله عامل مستقل فلا يتأخر الطلب بانتظار البريد
+class Notification(db.Model):
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        # سحب الرسائل المستحقة بالترتيب
+        db.Index('ix_notification_outbox_status_due', 'status', 'next_attempt_at', 'id'),
+        # تجميع كل الرسائل المعلقة لنفس المستلم في بريد واحد
+        db.Index('ix_notification_outbox_recipient_status', 'recipient', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # new_application, application_status, company_status, job_status
+    # الرسائل بنفس المفتاح لنفس المستلم تُدمج ويُرسل أحدثها فقط (مثل application:12)
+    dedupe_key = db.Column(db.String(100), nullable=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='Pending')  # Pending, Processing, Sent, Superseded, Failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(36), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Notification {self.id} {self.kind} {self.recipient} {self.status}>'
+
+
+# عدادات الطلبات لكل وظيفة (Rollup)
+# تُحدَّث مع كل طلب جديد أو تغيير حالة، فتقرأ لوحة الشركة صفاً لكل وظيفة بدل عدّ كل الطلبات
+class JobStats(db.Model):
+    __tablename__ = 'job_stats'
+    __table_args__ = (
+        db.Index('ix_job_stats_company_id', 'company_id'),
+    )
+    
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, nullable=False)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<JobStats {self.job_id} {self.applications}>'
+
+
+# عدد الطلبات اليومية لكل شركة؛ يبقى بعد أرشفة الوظائف لأنه سجل تاريخي
+class CompanyDailyApplications(db.Model):
+    __tablename__ = 'company_daily_applications'
+    
+    company_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CompanyDailyApplications {self.company_id} {self.day} {self.applications}>'
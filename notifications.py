@@ -0,0 +1,381 @@
+import importlib
+import json
+import logging
+import random
+import smtplib
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import and_, delete, event, insert, inspect, or_, select, update
+
+from models import db, Company, Job, JobSeeker, Application, Notification
+
+# ==================== كتابة الإشعارات مع التغيير ====================
+
+NEW_APPLICATION = 'new_application'
+APPLICATION_STATUS = 'application_status'
+COMPANY_STATUS = 'company_status'
+JOB_STATUS = 'job_status'
+
+STATUS_LABELS = {
+    'Pending': 'قيد المراجعة',
+    'Accepted': 'مقبول',
+    'Rejected': 'مرفوض',
+    'Approved': 'معتمد',
+    'Published': 'منشورة',
+    'Hidden': 'مخفية',
+}
+
+# عدد المعرّفات في كل استعلام حتى لا نتجاوز حد المتغيرات في SQLite
+_CHUNK = 500
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), _CHUNK):
+        yield ids[start:start + _CHUNK]
+
+
+def _enqueue(conn, rows):
+    now = datetime.utcnow()
+    params = [
+        {'recipient': recipient, 'kind': kind, 'dedupe_key': dedupe_key,
+         'payload': json.dumps(payload, ensure_ascii=False), 'status': 'Pending',
+         'attempts': 0, 'next_attempt_at': now, 'created_at': now}
+        for recipient, kind, dedupe_key, payload in rows
+    ]
+    if params:
+        conn.execute(insert(Notification.__table__), params)
+
+
+def enqueue_new_applications(conn, application_ids):
+    """إشعار الشركة بكل طلب جديد على وظائفها"""
+    for chunk in _chunks(application_ids):
+        _enqueue(conn, [
+            (email, NEW_APPLICATION, None, {'job_id': job_id, 'job_title': title})
+            for email, job_id, title in conn.execute(
+                select(Company.email, Job.job_id, Job.title)
+                .join(Job, Job.company_id == Company.company_id)
+                .join(Application, Application.job_id == Job.job_id)
+                .where(Application.application_id.in_(chunk))
+            )
+        ])
+
+
+def enqueue_application_status(conn, application_ids):
+    """إشعار الباحث بالحالة الحالية لطلباته"""
+    for chunk in _chunks(application_ids):
+        _enqueue(conn, [
+            (email, APPLICATION_STATUS, f'application:{application_id}',
+             {'job_title': title, 'status': status})
+            for email, application_id, title, status in conn.execute(
+                select(JobSeeker.email, Application.application_id, Job.title, Application.status)
+                .join(Application, Application.seeker_id == JobSeeker.seeker_id)
+                .join(Job, Job.job_id == Application.job_id)
+                .where(Application.application_id.in_(chunk))
+            )
+        ])
+
+
+def enqueue_company_status(conn, company_ids):
+    """إشعار الشركة بالحالة الحالية لحسابها"""
+    for chunk in _chunks(company_ids):
+        _enqueue(conn, [
+            (email, COMPANY_STATUS, f'company:{company_id}', {'status': status})
+            for email, company_id, status in conn.execute(
+                select(Company.email, Company.company_id, Company.status)
+                .where(Company.company_id.in_(chunk))
+            )
+        ])
+
+
+def enqueue_job_status(conn, job_ids):
+    """إشعار الشركة بالحالة الحالية لوظائفها"""
+    for chunk in _chunks(job_ids):
+        _enqueue(conn, [
+            (email, JOB_STATUS, f'job:{job_id}', {'job_title': title, 'status': status})
+            for email, job_id, title, status in conn.execute(
+                select(Company.email, Job.job_id, Job.title, Job.status)
+                .join(Job, Job.company_id == Company.company_id)
+                .where(Job.job_id.in_(chunk))
+            )
+        ])
+
+
+def _status_changed(obj):
+    return inspect(obj).attrs.status.history.has_changes()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _enqueue_notifications(session, flush_context):
+    """كتابة الإشعارات في معاملة التغيير نفسها؛ التحديثات الجماعية تستدعي دوال enqueue_* مباشرة"""
+    new_applications = {a.application_id for a in session.new if isinstance(a, Application)}
+    changed = {Application: set(), Company: set(), Job: set()}
+    for obj in session.dirty:
+        if type(obj) in changed and _status_changed(obj):
+            changed[type(obj)].add(inspect(obj).identity[0])
+    if not new_applications and not any(changed.values()):
+        return
+
+    conn = session.connection()
+    enqueue_new_applications(conn, new_applications)
+    enqueue_application_status(conn, changed[Application])
+    enqueue_company_status(conn, changed[Company])
+    enqueue_job_status(conn, changed[Job])
+
+
+def prune_notifications(engine, older_than_days):
+    """حذف الإشعارات المرسلة أو المدموجة الأقدم من المدة المحددة"""
+    before = datetime.utcnow() - timedelta(days=older_than_days)
+    with engine.begin() as conn:
+        return conn.execute(
+            delete(Notification)
+            .where(Notification.status.in_(('Sent', 'Superseded')), Notification.created_at < before)
+        ).rowcount
+
+
+# ==================== المرسلات ====================
+
+class LogSender:
+    """يكتب الرسائل في السجل بدلاً من إرسالها (للتطوير)"""
+
+    def __init__(self, config):
+        self.logger = logging.getLogger('notifications')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def send(self, recipient, subject, body):
+        self.logger.warning('إشعار إلى %s: %s\n%s', recipient, subject, body)
+
+
+class SmtpSender:
+    """إرسال عبر SMTP باتصال واحد لكل دفعة"""
+
+    def __init__(self, config):
+        self.host = config['SMTP_HOST']
+        self.port = config['SMTP_PORT']
+        self.username = config['SMTP_USERNAME']
+        self.password = config['SMTP_PASSWORD']
+        self.use_tls = config['SMTP_USE_TLS']
+        self.from_address = config['MAIL_FROM']
+        self.timeout = config['SMTP_TIMEOUT']
+        self.connection = None
+
+    def __enter__(self):
+        self.connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            self.connection.starttls()
+        if self.username:
+            self.connection.login(self.username, self.password)
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.connection.quit()
+        except smtplib.SMTPException:
+            pass
+        except OSError:
+            pass
+        self.connection = None
+        return False
+
+    def send(self, recipient, subject, body):
+        message = EmailMessage()
+        message['From'] = self.from_address
+        message['To'] = recipient
+        message['Subject'] = subject
+        message.set_content(body)
+        self.connection.send_message(message)
+
+
+SENDERS = {'log': LogSender, 'smtp': SmtpSender}
+
+
+def make_sender(config):
+    """المرسل حسب NOTIFICATION_SENDER: log أو smtp أو مسار module:Class لمرسل مخصص"""
+    name = config['NOTIFICATION_SENDER']
+    if ':' in name:
+        module, attribute = name.split(':', 1)
+        return getattr(importlib.import_module(module), attribute)(config)
+    return SENDERS[name](config)
+
+
+# ==================== صياغة الرسائل ====================
+
+def _line(kind, payload, count=1):
+    status = STATUS_LABELS.get(payload.get('status'), payload.get('status'))
+    if kind == NEW_APPLICATION:
+        if count > 1:
+            return f"{count} طلبات جديدة على وظيفة «{payload['job_title']}»"
+        return f"طلب جديد على وظيفة «{payload['job_title']}»"
+    if kind == APPLICATION_STATUS:
+        return f"حالة طلبك على وظيفة «{payload['job_title']}»: {status}"
+    if kind == COMPANY_STATUS:
+        return f"حالة حساب شركتك: {status}"
+    if kind == JOB_STATUS:
+        return f"حالة وظيفتك «{payload['job_title']}»: {status}"
+    return kind
+
+
+def compose(messages):
+    """بريد واحد لكل الرسائل المعلقة لمستلم واحد: (العنوان، النص)
+
+    messages: قائمة (kind, payload) بعد الدمج؛ الطلبات الجديدة على نفس الوظيفة تُجمع في سطر.
+    """
+    lines = OrderedDict()
+    for kind, payload in messages:
+        key = (kind, payload.get('job_id')) if kind == NEW_APPLICATION else (kind, len(lines))
+        count, _ = lines.get(key, (0, payload))
+        lines[key] = (count + 1, payload)
+    text_lines = [_line(kind, payload, count) for (kind, _), (count, payload) in lines.items()]
+
+    subject = text_lines[0] if len(text_lines) == 1 else f'لديك {len(text_lines)} إشعارات جديدة من منصة التوظيف'
+    body = '\n'.join(f'- {line}' for line in text_lines) + '\n\nمنصة التوظيف'
+    return subject, body
+
+
+# ==================== الطابور والعامل ====================
+
+MAX_ATTEMPTS = 5
+CLAIM_BATCH_SIZE = 50
+# الانتظار قبل المحاولة التالية: 30 ثانية ثم يتضاعف حتى ساعة
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=1)
+# الرسالة المحجوزة أطول من هذا تعتبر متروكة (توقف العامل مثلاً) وتُعاد للطابور
+STALE_CLAIM = timedelta(minutes=10)
+
+
+def retry_delay(attempts):
+    """تأخير أسي مع عشوائية حتى لا تعيد كل الرسائل الفاشلة المحاولة في اللحظة نفسها"""
+    delay = min(RETRY_MAX, RETRY_BASE * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(worker_id, limit=CLAIM_BATCH_SIZE):
+    """حجز كل الرسائل المستحقة لأقدم المستلمين في الطابور (حتى limit مستلم)"""
+    now = datetime.utcnow()
+    stale = and_(Notification.status == 'Processing', Notification.claimed_at < now - STALE_CLAIM)
+    # رسالة أوقفت العامل في محاولتها الأخيرة تنتهي بالفشل بدلاً من إعادتها بلا نهاية
+    db.session.execute(
+        update(Notification)
+        .where(stale, Notification.attempts >= MAX_ATTEMPTS)
+        .values(status='Failed', claimed_by=None, error='توقف العامل أثناء الإرسال')
+        .execution_options(synchronize_session=False)
+    )
+    claimable = or_(
+        and_(Notification.status == 'Pending', Notification.next_attempt_at <= now),
+        and_(stale, Notification.attempts < MAX_ATTEMPTS),
+    )
+    oldest = select(Notification.recipient).where(claimable).order_by(Notification.id).limit(limit * 4)
+    if db.engine.dialect.name == 'postgresql':
+        oldest = oldest.with_for_update(skip_locked=True)
+    recipients = list(dict.fromkeys(db.session.execute(oldest).scalars()))[:limit]
+    if not recipients:
+        db.session.commit()
+        return []
+
+    db.session.execute(
+        update(Notification)
+        .where(Notification.recipient.in_(recipients), claimable)
+        .values(status='Processing', claimed_by=worker_id, claimed_at=now,
+                attempts=Notification.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return db.session.execute(
+        select(Notification.id, Notification.recipient, Notification.kind, Notification.dedupe_key,
+               Notification.payload, Notification.attempts)
+        .where(Notification.claimed_by == worker_id, Notification.status == 'Processing')
+        .order_by(Notification.id)
+    ).all()
+
+
+def _coalesce(rows):
+    """حذف الرسائل التي تليها رسالة أحدث بنفس المفتاح؛ تعيد (المرسلة، المدموجة)"""
+    latest = {row.dedupe_key: row.id for row in rows if row.dedupe_key}
+    kept = [row for row in rows if not row.dedupe_key or latest[row.dedupe_key] == row.id]
+    superseded = [row.id for row in rows if row.dedupe_key and latest[row.dedupe_key] != row.id]
+    return kept, superseded
+
+
+def _mark(ids, **values):
+    if ids:
+        db.session.execute(
+            update(Notification).where(Notification.id.in_(ids))
+            .values(claimed_by=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def deliver_batch(rows, sender):
+    """إرسال بريد واحد لكل مستلم وتسجيل النتيجة؛ تعيد (عدد الرسائل المرسلة، عدد الفاشلة)"""
+    by_recipient = OrderedDict()
+    for row in rows:
+        by_recipient.setdefault(row.recipient, []).append(row)
+
+    now = datetime.utcnow()
+    sent = failed = 0
+    try:
+        with sender:
+            for recipient, messages in by_recipient.items():
+                kept, superseded = _coalesce(messages)
+                _mark(superseded, status='Superseded', sent_at=now)
+                subject, body = compose([(row.kind, json.loads(row.payload)) for row in kept])
+                ids = [row.id for row in kept]
+                try:
+                    sender.send(recipient, subject, body)
+                except Exception as error:
+                    _retry(kept, error)
+                    failed += len(kept)
+                else:
+                    _mark(ids, status='Sent', sent_at=now, error=None)
+                    sent += len(kept)
+                # تثبيت كل مستلم حتى لا يُعاد إرسال ما أُرسل إذا توقف العامل
+                db.session.commit()
+    except Exception as error:
+        # تعذر فتح الاتصال: كل ما لم يُسجل بعد يعود للطابور
+        remaining = db.session.execute(
+            select(Notification.id, Notification.attempts)
+            .where(Notification.id.in_([row.id for row in rows]), Notification.status == 'Processing')
+        ).all()
+        _retry(remaining, error)
+        failed += len(remaining)
+        db.session.commit()
+    return sent, failed
+
+
+def _retry(rows, error):
+    now = datetime.utcnow()
+    for row in rows:
+        values = {'error': str(error)[:255]}
+        if row.attempts >= MAX_ATTEMPTS:
+            values['status'] = 'Failed'
+        else:
+            values['status'] = 'Pending'
+            values['next_attempt_at'] = now + retry_delay(row.attempts)
+        _mark([row.id], **values)
+
+
+def run_worker(app, batch_size=CLAIM_BATCH_SIZE, poll_interval=2.0, stop_when_idle=False):
+    """حلقة العامل: يحجز دفعة مستلمين، يرسل لكل منهم بريداً واحداً، وينتظر عند فراغ الطابور"""
+    worker_id = str(uuid.uuid4())
+    with app.app_context():
+        sender = make_sender(app.config)
+        while True:
+            rows = claim_batch(worker_id, batch_size)
+            if not rows:
+                if stop_when_idle:
+                    return
+                time.sleep(poll_interval)
+                continue
+            sent, failed = deliver_batch(rows, sender)
+            if failed:
+                app.logger.warning('تعذر إرسال %d إشعار، ستُعاد المحاولة لاحقاً', failed)
@@ -0,0 +1,138 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+# ==================== مخازن الصفحات ====================
+
+
+class MemoryBackend:
+    """مخزن داخل العملية بحجم محدود بالبايت؛ يُحذف الأقدم استخداماً عند الامتلاء"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SharedBackend:
+    """مخزن مشترك بين العمليات عبر عميل بواجهة Redis (get و set مع ex)
+
+    يُمرَّر العميل جاهزاً، فيمكن استبداله بأي كائن بنفس الواجهة.
+    حجم المخزن يحدده الخادم نفسه (maxmemory مع سياسة allkeys-lru).
+    """
+
+    def __init__(self, client, prefix='page:', ttl=3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url, **options):
+        # redis مطلوب فقط عند استخدام المخزن المشترك
+        import redis
+        return cls(redis.Redis.from_url(url), **options)
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+
+# ==================== تخزين الاستجابات ====================
+
+# الترويسات المحفوظة مع الصفحة (لا تُحفظ ترويسات الجلسة والكوكيز أبداً)
+_KEPT_HEADERS = ('Content-Type', 'Link')
+
+
+def _pack(response):
+    headers = [(name, response.headers[name]) for name in _KEPT_HEADERS if name in response.headers]
+    return json.dumps(headers).encode() + b'\n' + response.get_data()
+
+
+def _unpack(value):
+    headers, body = value.split(b'\n', 1)
+    return current_app.response_class(body, headers=json.loads(headers))
+
+
+def init_page_cache(app, backend=None):
+    """تفعيل ذاكرة الصفحات؛ PAGE_CACHE_URL يختار المخزن المشترك بدلاً من الداخلي"""
+    if backend is None:
+        url = app.config.get('PAGE_CACHE_URL')
+        if url:
+            backend = SharedBackend.from_url(url, ttl=app.config.get('PAGE_CACHE_TTL', 3600))
+        else:
+            backend = MemoryBackend(app.config.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    app.extensions['page_cache'] = backend
+    return backend
+
+
+def cached_page(version_for):
+    """تخزين الصفحة المعروضة للزوار حسب المسار والمعاملات ورقم الإصدار
+
+    version_for تستقبل معاملات المسار وتُرجع رقم إصدار البيانات المعروضة
+    (أو None لتجاوز الذاكرة، مثل وظيفة غير موجودة). تغير الإصدار يعني مفتاحاً
+    جديداً، فلا حاجة لحذف النسخ القديمة؛ يزيلها LRU.
+    المستخدم المسجل يرى اسمه وأزراراً خاصة به، فتُعرض صفحته دون ذاكرة.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            backend = current_app.extensions.get('page_cache')
+            if backend is None or session.get('user_id') or request.method != 'GET':
+                return view(**kwargs)
+
+            version = version_for(**kwargs)
+            if version is None:
+                return view(**kwargs)
+
+            key = '|'.join([
+                request.endpoint,
+                json.dumps(kwargs, sort_keys=True),
+                json.dumps(sorted(request.args.items(multi=True)), ensure_ascii=False),
+                str(version),
+                # الصفحة تحمل عناوين الملفات الثابتة بالبصمات، فتتغير مع كل نشر يغيرها
+                getattr(current_app.extensions.get('assets'), 'version', ''),
+            ])
+            cached = backend.get(key)
+            if cached is not None:
+                response = _unpack(cached)
+                response.headers['X-Page-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(**kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                backend.set(key, _pack(response))
+            response.headers['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+# الحد الأقصى لعدد العناصر في الصفحة الواحدة مهما طلب العميل
+MAX_PER_PAGE = 50
+
+
+class KeysetPage:
+    """صفحة نتائج مع مؤشر الصفحة التالية"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def encode_cursor(values):
+    """ترميز قيم مفتاح الترتيب لآخر عنصر في رمز نصي آمن للروابط"""
+    payload = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def _matches(value, column):
+    """هل القيمة من النوع الذي يتوقعه عمود الترتيب (تاريخ، رقم صحيح، رقم عشري)؟"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, datetime)):
+        return False
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return not isinstance(value, datetime)
+    if expected is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    return type(value) is expected
+
+
+def decode_cursor(token, columns=None):
+    """فك ترميز المؤشر، ويعيد None إذا كان غير صالح
+
+    مع columns يجب أن يطابق عدد القيم وأنواعها أعمدة الترتيب، حتى لا يصل إلى
+    الاستعلام مؤشر معدّل يدوياً (قائمة داخل قائمة، أو نص مكان تاريخ).
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            return None
+        values = [_decode_value(value) for value in payload]
+    except (ValueError, TypeError, KeyError):
+        return None
+    if columns is not None and (
+        len(values) != len(columns)
+        or not all(_matches(value, column) for value, column in zip(values, columns))
+    ):
+        return None
+    return values
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=12, descending=True):
+    """ترقيم بدون OFFSET: يبدأ مباشرة بعد آخر مفتاح ترتيب في المؤشر
+
+    columns: أعمدة مفتاح الترتيب، ويجب أن يكون آخرها فريداً (مثل المفتاح الأساسي)
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    key = tuple_(*columns)
+
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.add_columns(*columns).order_by(*order).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1][1:])
+
+    return KeysetPage([row[0] for row in rows], next_cursor)
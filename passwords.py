@@ -0,0 +1,79 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# ==================== إعدادات الهاش ====================
+
+# الافتراضي هو افتراضي Werkzeug نفسه حتى لا تتغير الهاشات الحالية
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_CONCURRENCY = os.cpu_count() or 1
+DEFAULT_TIMEOUT = 5.0
+
+
+class HashingBusy(Exception):
+    """عدد عمليات الهاش المنتظرة تجاوز الحد المسموح"""
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def hash_method():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """الصيغة الكاملة للخوارزمية كما يكتبها Werkzeug في بداية الهاش (مثل pbkdf2:sha256:600000)"""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=hash_method())
+
+
+def needs_rehash(stored_hash):
+    """هل الهاش المخزن بخوارزمية أو تكلفة مختلفة عن الإعدادات الحالية؟"""
+    return stored_hash.split('$', 1)[0] != _method_prefix(hash_method())
+
+
+# ==================== التنفيذ المحدود ====================
+
+_lock = threading.Lock()
+_pool = None
+
+
+def _executor():
+    """مجمع خيوط لكل عملية؛ يُعاد إنشاؤه بعد fork لأن الخيوط لا تنتقل للعملية الابنة"""
+    global _pool
+    with _lock:
+        if _pool is None or _pool[0] != os.getpid():
+            concurrency = _config('PASSWORD_HASH_CONCURRENCY', DEFAULT_CONCURRENCY)
+            _pool = (
+                os.getpid(),
+                ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='password-hash'),
+                # حد أقصى للعمليات الجارية والمنتظرة معاً
+                threading.BoundedSemaphore(concurrency * 2),
+            )
+        return _pool[1], _pool[2]
+
+
+def verify_password(stored_hash, password):
+    """التحقق من كلمة المرور عبر مجمع محدود حتى لا تستهلك موجة دخول كل المعالج
+
+    يرفع HashingBusy إذا لم يتوفر مكان في الطابور خلال PASSWORD_HASH_TIMEOUT.
+    """
+    executor, slots = _executor()
+    timeout = _config('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT)
+    if not slots.acquire(timeout=timeout):
+        raise HashingBusy()
+    try:
+        return executor.submit(check_password_hash, stored_hash, password).result()
+    finally:
+        slots.release()
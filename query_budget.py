@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+
+from sqlalchemy import func, insert, select
+
+from migrations import upgrade
+from models import db, Admin, Job, Application
+from passwords import hash_password
+from synthetic import generate
+
+# ==================== فحص عدد الاستعلامات لكل صفحة ====================
+
+# أقصى عدد استعلامات SQL لكل صفحة (من ترويسة X-SQL-Count)؛ يجب ألا يكبر مع عدد الصفوف
+QUERY_BUDGETS = {
+    'index': 6,
+    'search_jobs': 6,
+    'admin_dashboard': 8,
+    'job_applicants': 6,
+    'seeker_dashboard': 8,
+    'company_dashboard': 8,
+}
+
+
+def _budget_pages(conn, admin_id):
+    """(المسار، العنوان، الجلسة) لكل صفحة، بأكبر شركة ووظيفة وباحث في البيانات الحالية"""
+    def largest(column):
+        return conn.execute(
+            select(column).group_by(column).order_by(func.count().desc(), column).limit(1)
+        ).scalar()
+
+    company_id = largest(Job.company_id)
+    job_id = largest(Application.job_id)
+    job_company_id = conn.execute(select(Job.company_id).where(Job.job_id == job_id)).scalar()
+    seeker_id = largest(Application.seeker_id)
+    return [
+        ('index', '/', None),
+        ('search_jobs', '/search?q=مطور', None),
+        ('admin_dashboard', '/admin/dashboard', ('admin', admin_id)),
+        ('job_applicants', f'/company/job/{job_id}/applicants', ('company', job_company_id)),
+        ('seeker_dashboard', '/seeker/dashboard', ('seeker', seeker_id)),
+        ('company_dashboard', '/company/dashboard', ('company', company_id)),
+    ]
+
+
+def _measure(app, admin_id, rows):
+    with app.app_context(), db.engine.connect() as conn:
+        pages = _budget_pages(conn, admin_id)
+
+    # كل طلب خارج أي سياق تطبيق مفتوح، فيبدأ عداد الاستعلامات من الصفر
+    results = []
+    for route, url, user in pages:
+        client = app.test_client()
+        if user is not None:
+            with client.session_transaction() as session:
+                session['user_type'], session['user_id'] = user
+                session['user_name'] = user[0]
+        response = client.get(url)
+        count = int(response.headers.get('X-SQL-Count', -1)) if response.status_code == 200 else None
+        response.close()
+        results.append((route, rows, count, QUERY_BUDGETS[route]))
+    return results
+
+
+def measure_query_budget(app, rows=1000):
+    """يملأ قاعدة app الفارغة بـ rows طلب ثم بعشرة أضعافها ويقيس عدد الاستعلامات في كل مرة
+
+    الدفعة الثانية تزيد وظائف الشركة الواحدة وطلبات الوظيفة والباحث أيضاً، لا عدد الصفوف
+    الكلي فقط، فيظهر أي استعلام لكل صف (N+1). يعيد [(المسار، الصفوف، العدد، الحد)]؛
+    العدد None إذا لم ترد الصفحة بـ 200.
+    """
+    if rows < 720:
+        raise ValueError('rows يجب ألا يقل عن 720 حتى تكفي الوظائف لطلبات كل باحث')
+    # الذاكرة تعيد الصفحة دون استعلامات، فلا تقيس شيئاً
+    app.extensions.pop('page_cache', None)
+    app.config['SQL_COUNT_HEADER'] = True
+
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+        with db.engine.begin() as conn:
+            admin_id = conn.execute(insert(Admin).values(
+                full_name='فحص الاستعلامات', email='query-budget@example.test',
+                password=hash_password('123456'),
+            )).inserted_primary_key[0]
+
+        generate(db.engine, companies=2, jobs=rows // 20, seekers=rows // 20, applications=rows)
+    results = _measure(app, admin_id, rows)
+
+    with app.app_context():
+        # شركة واحدة بعشرة أضعاف الوظائف، و180 طلباً لكل باحث بدلاً من 20
+        generate(db.engine, companies=1, jobs=rows // 4, seekers=rows // 20, applications=rows * 9)
+    return results + _measure(app, admin_id, rows * 10)
+
+
+def check_query_budget(create_app, rows=1000, template_folder=None):
+    """القياس على تطبيق جديد بقاعدة SQLite مؤقتة تُحذف بعده، فلا تُمس قاعدة التطبيق الفعلية"""
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{directory}/budget.db',
+                          'DATABASE_REPLICA_URL': ''})
+        if template_folder:
+            app.template_folder = template_folder
+        return measure_query_budget(app, rows)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
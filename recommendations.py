@@ -0,0 +1,364 @@
+import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from cache import PUBLISHED_JOBS, get_version
+from models import db, Job, Application
+from search import FTS_WEIGHTS, normalize_arabic
+
+# ==================== تحويل الوظيفة إلى متجه TF-IDF ====================
+
+# كلمات عربية فقط أو لاتينية، بحرفين على الأقل (بدون أرقام)
+_TOKEN = re.compile(r'[^\W\d_]{2,}')
+
+# أدوات التعريف والعطف الملتصقة بالكلمة؛ الأطول أولاً
+_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+
+_STOPWORDS = frozenset(normalize_arabic(word) for word in (
+    'في', 'من', 'على', 'إلى', 'عن', 'مع', 'أو', 'ثم', 'هذا', 'هذه', 'ذلك', 'التي', 'الذي',
+    'كل', 'بعد', 'قبل', 'حتى', 'لدى', 'لا', 'ما', 'أن', 'إن', 'كان', 'عند', 'بين', 'نحن',
+    'نبحث', 'غير', 'ضمن', 'خلال', 'أي', 'تقل',
+    'the', 'and', 'of', 'to', 'in', 'for', 'with', 'an', 'or', 'on',
+))
+
+# وزن التصنيف يعادل تكرار كلمة في العنوان؛ يُضاف كرمز مستقل لا يختلط بالكلمات
+CATEGORY_WEIGHT = FTS_WEIGHTS[0]
+
+# أعلى الكلمات وزناً فقط لكل وظيفة، حتى تبقى المصفوفة صغيرة
+MAX_TERMS_PER_JOB = 32
+# أعلى الكلمات وزناً في ملف الباحث (مجموع الوظائف التي تقدم عليها)
+MAX_PROFILE_TERMS = 64
+# عدد آخر الطلبات المستخدمة لبناء ملف الباحث
+PROFILE_APPLICATIONS = 20
+
+# الكلمات الموجودة في أكثر من هذه النسبة من الوظائف لا تميز بينها، وقوائمها هي الأطول،
+# فتُستبعد من ملف الباحث (الكلمات في أقل من ALWAYS_KEEP_DF وظيفة تبقى دائماً)
+MAX_DOCUMENT_FREQUENCY = 0.25
+ALWAYS_KEEP_DF = 1000
+
+# إضافة ثابتة للوظائف في مدينة الباحث
+CITY_BOOST = 0.1
+
+# دمج الإضافات الجديدة في المصفوفة الرئيسية عند تجاوزها هذه النسبة
+COMPACT_RATIO = 0.1
+COMPACT_MIN_ENTRIES = 10000
+
+
+def tokenize(value):
+    """كلمات النص بعد التطبيع العربي وحذف أداة التعريف وكلمات الربط"""
+    terms = []
+    for word in _TOKEN.findall(normalize_arabic(value)):
+        for prefix in _PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+                word = word[len(prefix):]
+                break
+        if word not in _STOPWORDS:
+            terms.append(word)
+    return terms
+
+
+def job_vector(category_name, title, description, requirements):
+    """أوزان كلمات الوظيفة: log للتكرار الموزون بالحقل ثم تطبيع L2"""
+    counts = Counter()
+    title_weight, description_weight, requirements_weight = FTS_WEIGHTS
+    for text, weight in ((title, title_weight), (description, description_weight),
+                         (requirements, requirements_weight)):
+        for term in tokenize(text):
+            counts[term] += weight
+    if category_name:
+        counts['#' + category_name.lower()] += CATEGORY_WEIGHT
+
+    weights = sorted(((1.0 + math.log(count), term) for term, count in counts.items()), reverse=True)
+    weights = weights[:MAX_TERMS_PER_JOB]
+    norm = math.sqrt(sum(weight * weight for weight, _ in weights)) or 1.0
+    return [(term, weight / norm) for weight, term in weights]
+
+
+# ==================== مصفوفة الوظائف ====================
+
+class JobMatrix:
+    """متجهات الوظائف المنشورة في مصفوفة متفرقة مرتبة حسب الكلمة (CSC)
+
+    كل عمود كلمة، وقيمه أرقام صفوف الوظائف التي تحتويها، فيكفي لحساب الدرجات المرور
+    على كلمات ملف الباحث فقط. الوظائف الجديدة تُضاف في جزء صغير منفصل (delta)
+    والمحذوفة تُعلَّم فقط، ثم يُدمج الكل عند تجاوز COMPACT_RATIO.
+    IDF يُحسب وقت الاستعلام من عدد الوظائف لكل كلمة، فلا يلزم إعادة حساب المتجهات المخزنة.
+
+    الكائن لا يتغير بعد إنشائه؛ التحديث ينتج كائناً جديداً فتقرأ الطلبات الجارية نسختها بأمان.
+    """
+
+    def __init__(self, vocabulary, df, job_ids, cities, alive, city_codes, revisions,
+                 indptr, indices, data, delta_rows, delta_terms, delta_data):
+        self.vocabulary = vocabulary
+        self.df = df
+        self.job_ids = job_ids
+        self.cities = cities
+        self.alive = alive
+        self.city_codes = city_codes
+        self.revisions = revisions
+        self.rows = {int(job_id): row for row, job_id in enumerate(job_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.delta_rows = delta_rows
+        self.delta_terms = delta_terms
+        self.delta_data = delta_data
+
+    @property
+    def size(self):
+        """عدد الوظائف الحية في المصفوفة"""
+        return int(self.alive.sum())
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.df, self.job_ids, self.cities, self.alive, self.indptr,
+                                      self.indices, self.data, self.delta_rows, self.delta_terms,
+                                      self.delta_data))
+
+    @classmethod
+    def build(cls, rows):
+        """بناء المصفوفة من صفوف (job_id, revision, city, category_name, title, description, requirements)"""
+        return cls.empty().update(rows, compact=True)
+
+    @classmethod
+    def empty(cls):
+        return cls({}, np.zeros(0, np.float32), np.zeros(0, np.int64), np.zeros(0, np.int32),
+                   np.zeros(0, bool), {}, {}, np.zeros(1, np.int64), np.zeros(0, np.int32),
+                   np.zeros(0, np.float32), np.zeros(0, np.int32), np.zeros(0, np.int32),
+                   np.zeros(0, np.float32))
+
+    def update(self, rows, removed=(), compact=False):
+        """نسخة جديدة بعد إضافة أو تحديث الوظائف في rows وحذف المعرّفات في removed"""
+        vocabulary = dict(self.vocabulary)
+        city_codes = dict(self.city_codes)
+        revisions = dict(self.revisions)
+        alive = self.alive.copy()
+        df = self.df
+
+        # الوظيفة المعدلة تُحذف ثم تُضاف بمتجهها الجديد؛ df ينقص عند الدمج التالي فقط
+        stale = [self.rows[job_id] for job_id in removed if job_id in self.rows]
+        for job_id in removed:
+            revisions.pop(job_id, None)
+
+        new_ids, new_cities = array('q'), array('i')
+        new_rows, new_terms, new_data = array('i'), array('i'), array('f')
+        first_row = len(self.job_ids)
+        for job_id, revision, city, category_name, title, description, requirements in rows:
+            if job_id in self.rows:
+                stale.append(self.rows[job_id])
+            row = first_row + len(new_ids)
+            new_ids.append(job_id)
+            new_cities.append(city_codes.setdefault(normalize_arabic(city), len(city_codes)))
+            revisions[job_id] = revision
+            for term, weight in job_vector(category_name, title, description, requirements):
+                new_rows.append(row)
+                new_terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                new_data.append(weight)
+
+        alive[stale] = False
+        alive = np.concatenate([alive, np.ones(len(new_ids), bool)])
+        new_terms = np.frombuffer(new_terms, np.int32)
+        df = np.concatenate([df, np.zeros(len(vocabulary) - len(df), np.float32)])
+        df += np.bincount(new_terms, minlength=len(vocabulary)).astype(np.float32)
+
+        matrix = JobMatrix(
+            vocabulary, df,
+            np.concatenate([self.job_ids, np.frombuffer(new_ids, np.int64)]),
+            np.concatenate([self.cities, np.frombuffer(new_cities, np.int32)]),
+            alive, city_codes, revisions, self.indptr, self.indices, self.data,
+            np.concatenate([self.delta_rows, np.frombuffer(new_rows, np.int32)]),
+            np.concatenate([self.delta_terms, new_terms]),
+            np.concatenate([self.delta_data, np.frombuffer(new_data, np.float32)]),
+        )
+        if compact or matrix._needs_compaction():
+            matrix = matrix._compact()
+        return matrix
+
+    def _needs_compaction(self):
+        pending = len(self.delta_data) + int((~self.alive).sum()) * MAX_TERMS_PER_JOB
+        return pending > max(COMPACT_MIN_ENTRIES, COMPACT_RATIO * len(self.data))
+
+    def _compact(self):
+        # تحويل الجزء الرئيسي إلى (صف، كلمة، وزن) ودمجه مع الإضافات ثم حذف الصفوف الميتة
+        base_terms = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        rows = np.concatenate([self.indices, self.delta_rows])
+        terms = np.concatenate([base_terms, self.delta_terms])
+        data = np.concatenate([self.data, self.delta_data])
+
+        keep = self.alive[rows]
+        renumber = np.cumsum(self.alive, dtype=np.int64) - 1
+        rows, terms, data = renumber[rows[keep]].astype(np.int32), terms[keep], data[keep]
+
+        order = np.argsort(terms, kind='stable')
+        counts = np.bincount(terms, minlength=len(self.vocabulary))
+        indptr = np.zeros(len(self.vocabulary) + 1, np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        return JobMatrix(
+            self.vocabulary, counts.astype(np.float32),
+            self.job_ids[self.alive], self.cities[self.alive], np.ones(self.size, bool),
+            self.city_codes, self.revisions, indptr, rows[order], data[order],
+            np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32),
+        )
+
+    def profile(self, documents):
+        """متجه الباحث: مجموع متجهات الوظائف التي تقدم عليها موزونة بـ IDF"""
+        total = Counter()
+        for category_name, title, description, requirements in documents:
+            for term, weight in job_vector(category_name, title, description, requirements):
+                term_id = self.vocabulary.get(term)
+                if term_id is not None:
+                    total[term_id] += weight
+        if not total:
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+
+        terms = np.fromiter(total.keys(), np.int32, len(total))
+        weights = np.fromiter(total.values(), np.float32, len(total))
+        common = self.df[terms] > max(MAX_DOCUMENT_FREQUENCY * self.size, ALWAYS_KEEP_DF)
+        terms, weights = terms[~common], weights[~common]
+        # IDF على جهة الباحث والوثيقة معاً كما في جداء TF-IDF
+        idf = np.log((1.0 + self.size) / (1.0 + self.df[terms])) + 1.0
+        weights *= idf * idf
+        top = np.argsort(-weights)[:MAX_PROFILE_TERMS]
+        terms, weights = terms[top], weights[top]
+        return terms, weights / (np.linalg.norm(weights) or 1.0)
+
+    def top(self, terms, weights, city=None, exclude=(), limit=6):
+        """أعلى الوظائف درجة لملف الباحث؛ الدرجات محسوبة لكل الوظائف دفعة واحدة"""
+        scores = np.zeros(len(self.job_ids), np.float32)
+        base_terms = len(self.indptr) - 1
+        for term, weight in zip(terms.tolist(), weights.tolist()):
+            if term < base_terms:
+                start, end = self.indptr[term], self.indptr[term + 1]
+                scores[self.indices[start:end]] += self.data[start:end] * weight
+
+        if len(self.delta_data) and len(terms):
+            order = np.argsort(terms)
+            position = np.searchsorted(terms[order], self.delta_terms)
+            position[position == len(terms)] = 0
+            match = terms[order][position] == self.delta_terms
+            np.add.at(scores, self.delta_rows[match], self.delta_data[match] * weights[order][position[match]])
+
+        city_code = self.city_codes.get(normalize_arabic(city)) if city else None
+        if city_code is not None:
+            scores[self.cities == city_code] += CITY_BOOST
+
+        scores[~self.alive] = -np.inf
+        excluded = [self.rows[job_id] for job_id in exclude if job_id in self.rows]
+        scores[excluded] = -np.inf
+
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return []
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+        candidates = candidates[scores[candidates] > 0]
+        # الأعلى درجة أولاً، وعند التساوي الأحدث (المعرّف الأكبر)
+        candidates = candidates[np.lexsort((-self.job_ids[candidates], -scores[candidates]))]
+        return self.job_ids[candidates].tolist()
+
+
+# ==================== التحديث من قاعدة البيانات ====================
+
+_JOB_TEXT = (Job.job_id, Job.revision, Job.city, Job.category_name, Job.title,
+             Job.description, Job.requirements)
+
+# حجم الدفعة عند قراءة نصوص الوظائف
+LOAD_BATCH_SIZE = 2000
+
+
+class Recommender:
+    """مصفوفة الوظائف في هذه العملية مع تحديثها في الخلفية عند تغير الوظائف المنشورة
+
+    البناء الأول يتم في خيط خلفي عند أول طلب، وحتى انتهائه لا تظهر اقتراحات.
+    بعدها يُقارن رقم إصدار PUBLISHED_JOBS كل refresh_interval ثانية، وعند تغيره
+    تُقرأ الوظائف الجديدة أو المعدلة فقط (حسب Job.revision) وتُضاف للمصفوفة.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self.matrix = None
+        self.version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def recommend(self, seeker, exclude=(), limit=6):
+        """معرّفات الوظائف المقترحة للباحث بالترتيب"""
+        self._maybe_refresh()
+        matrix = self.matrix
+        if matrix is None:
+            return []
+        documents = db.session.execute(
+            select(Job.category_name, Job.title, Job.description, Job.requirements)
+            .join(Application, Application.job_id == Job.job_id)
+            .where(Application.seeker_id == seeker.seeker_id)
+            .order_by(Application.applied_at.desc())
+            .limit(PROFILE_APPLICATIONS)
+        ).all()
+        terms, weights = matrix.profile(documents)
+        return matrix.top(terms, weights, city=seeker.city, exclude=exclude, limit=limit)
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self.matrix is not None and now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+            version = get_version(PUBLISHED_JOBS)
+            if self.matrix is not None and version == self.version:
+                return
+            self._thread = threading.Thread(target=self._refresh, daemon=True,
+                                            args=(current_app._get_current_object(), version))
+            self._thread.start()
+
+    def _refresh(self, app, version):
+        with app.app_context():
+            try:
+                self.refresh()
+                self.version = version
+            except Exception:
+                app.logger.exception('تعذر تحديث مصفوفة الوظائف المقترحة')
+
+    def refresh(self):
+        """بناء المصفوفة أو تحديثها بالوظائف المنشورة حالياً (يتطلب سياق التطبيق)"""
+        published = Job.status == 'Published'
+        if self.matrix is None:
+            rows = db.session.execute(
+                select(*_JOB_TEXT).where(published).execution_options(yield_per=LOAD_BATCH_SIZE)
+            )
+            self.matrix = JobMatrix.build(tuple(row) for row in rows)
+            return
+
+        matrix = self.matrix
+        current = dict(db.session.execute(select(Job.job_id, Job.revision).where(published)).all())
+        changed = [job_id for job_id, revision in current.items()
+                   if matrix.revisions.get(job_id) != revision]
+        removed = [job_id for job_id in matrix.revisions if job_id not in current]
+        if not changed and not removed:
+            return
+
+        rows = []
+        for start in range(0, len(changed), LOAD_BATCH_SIZE):
+            rows.extend(db.session.execute(
+                select(*_JOB_TEXT).where(published, Job.job_id.in_(changed[start:start + LOAD_BATCH_SIZE]))
+            ).all())
+        self.matrix = matrix.update([tuple(row) for row in rows], removed)
+
+
+def init_recommendations(app):
+    """تسجيل محرك الاقتراحات؛ لا يقرأ شيئاً من القاعدة حتى أول طلب"""
+    app.extensions['recommendations'] = Recommender(app.config.get('RECOMMENDATIONS_REFRESH_SECONDS', 30))
+
+
+def recommend_jobs(seeker, exclude=(), limit=6):
+    """الوظائف المقترحة للباحث في التطبيق الحالي"""
+    return current_app.extensions['recommendations'].recommend(seeker, exclude, limit)
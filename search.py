@@ -0,0 +1,281 @@
+import re
+
+from sqlalchemy import event, inspect, text
+
+from models import db, Job, CvText
+
+# ==================== تطبيع النص العربي ====================
+
+# التشكيل (الحركات والتنوين والشدة والسكون) وعلامات القرآن
+_TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TATWEEL = '\u0640'
+
+# توحيد أشكال الألف والياء والتاء المربوطة
+_LETTER_MAP = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+
+_WORD = re.compile(r'\w+')
+
+# أقصى عدد من الكلمات المأخوذة من نص البحث
+MAX_QUERY_TERMS = 8
+
+# أوزان الأعمدة في الترتيب: العنوان ثم المتطلبات ثم الوصف
+FTS_WEIGHTS = (4.0, 1.0, 2.0)
+
+
+def normalize_arabic(value):
+    """تطبيع النص العربي قبل الفهرسة أو البحث"""
+    if not value:
+        return ''
+    value = _TASHKEEL.sub('', value).replace(_TATWEEL, '')
+    return value.translate(_LETTER_MAP).lower()
+
+
+def query_terms(query_text):
+    """استخراج كلمات البحث بعد التطبيع"""
+    return _WORD.findall(normalize_arabic(query_text))[:MAX_QUERY_TERMS]
+
+
+# ==================== إنشاء الفهرس ====================
+
+def init_search_index(conn):
+    """إنشاء فهرس البحث النصي حسب نوع قاعدة البيانات وتعبئته عند الإنشاء"""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+        )).first()
+        if exists:
+            return
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE jobs_fts USING fts5("
+            "title, description, requirements, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    elif dialect == 'postgresql':
+        exists = conn.execute(text("SELECT to_regclass('jobs_search')")).scalar()
+        if exists:
+            return
+        conn.execute(text(
+            "CREATE TABLE jobs_search ("
+            "job_id INTEGER PRIMARY KEY REFERENCES jobs (job_id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX ix_jobs_search_document ON jobs_search USING GIN (document)"
+        ))
+    else:
+        return
+
+    _rebuild(conn)
+
+
+def rebuild_search_index(engine):
+    """إعادة بناء فهرس البحث بالكامل من جدول الوظائف"""
+    with engine.begin() as conn:
+        _rebuild(conn)
+
+
+def _rebuild(conn):
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        conn.execute(text("DELETE FROM jobs_fts"))
+    elif dialect == 'postgresql':
+        conn.execute(text("DELETE FROM jobs_search"))
+    else:
+        return
+
+    rows = conn.execute(
+        db.select(Job.job_id, Job.title, Job.description, Job.requirements)
+        .execution_options(yield_per=1000)
+    )
+    for batch in rows.partitions():
+        index_jobs(conn, batch)
+
+
+# ==================== مزامنة الفهرس ====================
+
+def index_jobs(conn, rows):
+    """إضافة أو تحديث مجموعة وظائف في الفهرس: (job_id, title, description, requirements)"""
+    params = [
+        {
+            'job_id': job_id,
+            'title': normalize_arabic(title),
+            'description': normalize_arabic(description),
+            'requirements': normalize_arabic(requirements),
+        }
+        for job_id, title, description, requirements in rows
+    ]
+    if not params:
+        return
+
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        conn.execute(text("DELETE FROM jobs_fts WHERE rowid = :job_id"), params)
+        conn.execute(text(
+            "INSERT INTO jobs_fts (rowid, title, description, requirements) "
+            "VALUES (:job_id, :title, :description, :requirements)"
+        ), params)
+    elif dialect == 'postgresql':
+        conn.execute(text(
+            "INSERT INTO jobs_search (job_id, document) VALUES (:job_id, "
+            "setweight(to_tsvector('simple', :title), 'A') || "
+            "setweight(to_tsvector('simple', :requirements), 'B') || "
+            "setweight(to_tsvector('simple', :description), 'C')) "
+            "ON CONFLICT (job_id) DO UPDATE SET document = EXCLUDED.document"
+        ), params)
+
+
+def unindex_jobs(conn, job_ids):
+    """حذف وظائف من الفهرس"""
+    params = [{'job_id': job_id} for job_id in job_ids]
+    if not params:
+        return
+
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        conn.execute(text("DELETE FROM jobs_fts WHERE rowid = :job_id"), params)
+    elif dialect == 'postgresql':
+        conn.execute(text("DELETE FROM jobs_search WHERE job_id = :job_id"), params)
+
+
+_INDEXED_FIELDS = ('title', 'description', 'requirements')
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    """تحديث الفهرس داخل نفس المعاملة عند إضافة أو تعديل أو حذف وظيفة"""
+    changed = [job for job in session.new if isinstance(job, Job)]
+    for job in session.dirty:
+        if not isinstance(job, Job):
+            continue
+        state = inspect(job)
+        if any(state.attrs[field].history.has_changes() for field in _INDEXED_FIELDS):
+            changed.append(job)
+    deleted = [job.job_id for job in session.deleted if isinstance(job, Job)]
+
+    if not changed and not deleted:
+        return
+
+    conn = session.connection()
+    index_jobs(conn, [
+        (job.job_id, job.title, job.description, job.requirements) for job in changed
+    ])
+    unindex_jobs(conn, deleted)
+
+
+# ==================== البحث ====================
+
+def _match_expression(terms, dialect):
+    """تحويل الكلمات إلى تعبير بحث: كل الكلمات مطلوبة مع مطابقة البادئة"""
+    if dialect == 'sqlite':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def ranked_matches(query_text, dialect):
+    """استعلام فرعي يعيد (job_id, rank) للوظائف المطابقة، الأقل rank هو الأفضل"""
+    terms = query_terms(query_text)
+    if not terms:
+        return None
+
+    match = _match_expression(terms, dialect)
+    if dialect == 'sqlite':
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        stmt = text(
+            f"SELECT rowid AS job_id, bm25(jobs_fts, {weights}) AS rank "
+            "FROM jobs_fts WHERE jobs_fts MATCH :match"
+        ).bindparams(match=match)
+    elif dialect == 'postgresql':
+        stmt = text(
+            "SELECT job_id, -ts_rank(document, to_tsquery('simple', :match)) AS rank "
+            "FROM jobs_search WHERE document @@ to_tsquery('simple', :match)"
+        ).bindparams(match=match)
+    else:
+        return None
+
+    return stmt.columns(job_id=db.Integer, rank=db.Float).subquery('ranked_jobs')
+
+
+# ==================== فهرس نصوص السير الذاتية ====================
+
+def init_cv_index(conn):
+    """إنشاء فهرس البحث في نصوص السير الذاتية (cv_texts)"""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS cv_fts USING fts5("
+            "content, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    elif dialect == 'postgresql':
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS cv_search ("
+            "cv_id INTEGER PRIMARY KEY REFERENCES cv_texts (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_cv_search_document ON cv_search USING GIN (document)"
+        ))
+
+
+def index_cv_text(conn, cv_id, content):
+    """إضافة أو تحديث نص سيرة ذاتية في الفهرس"""
+    params = {'cv_id': cv_id, 'content': normalize_arabic(content)}
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        conn.execute(text("DELETE FROM cv_fts WHERE rowid = :cv_id"), params)
+        conn.execute(text("INSERT INTO cv_fts (rowid, content) VALUES (:cv_id, :content)"), params)
+    elif dialect == 'postgresql':
+        conn.execute(text(
+            "INSERT INTO cv_search (cv_id, document) VALUES (:cv_id, to_tsvector('simple', :content)) "
+            "ON CONFLICT (cv_id) DO UPDATE SET document = EXCLUDED.document"
+        ), params)
+
+
+def rebuild_cv_index(engine):
+    """إعادة بناء فهرس السير الذاتية من النصوص المستخرجة"""
+    with engine.begin() as conn:
+        init_cv_index(conn)
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            conn.execute(text("DELETE FROM cv_fts"))
+        elif dialect == 'postgresql':
+            conn.execute(text("DELETE FROM cv_search"))
+        else:
+            return
+
+        rows = conn.execute(
+            db.select(CvText.id, CvText.content)
+            .where(CvText.status == 'Done')
+            .execution_options(yield_per=500)
+        )
+        for cv_id, content in rows:
+            index_cv_text(conn, cv_id, content)
+
+
+def ranked_cv_matches(query_text, dialect):
+    """استعلام فرعي يعيد (cv_id, rank) للسير الذاتية المطابقة، الأقل rank هو الأفضل"""
+    terms = query_terms(query_text)
+    if not terms:
+        return None
+
+    match = _match_expression(terms, dialect)
+    if dialect == 'sqlite':
+        stmt = text(
+            "SELECT rowid AS cv_id, bm25(cv_fts) AS rank FROM cv_fts WHERE cv_fts MATCH :match"
+        ).bindparams(match=match)
+    elif dialect == 'postgresql':
+        stmt = text(
+            "SELECT cv_id, -ts_rank(document, to_tsquery('simple', :match)) AS rank "
+            "FROM cv_search WHERE document @@ to_tsquery('simple', :match)"
+        ).bindparams(match=match)
+    else:
+        return None
+
+    return stmt.columns(cv_id=db.Integer, rank=db.Float).subquery('ranked_cvs')
@@ -1,9 +1,16 @@
-const CACHE_NAME = 'recruitment-platform-v1';
+// يستبدل الخادم هذين السطرين عند تقديم الملف من /service-worker.js:
+// رقم الإصدار مشتق من بصمات الملفات الثابتة، والعناوين تحمل البصمات نفسها
+const ASSET_VERSION = 'dev';
+const PRECACHE_ASSETS = ['/static/css/style.css', '/static/js/app.js', '/static/manifest.json'];
+
+const CACHE_NAME = `recruitment-platform-${ASSET_VERSION}`;
+// اسم ذاكرة الواجهة مرتبط بالإصدار أيضاً، فيحذفها التفعيل مع كل نشر
+const API_CACHE_NAME = `recruitment-api-${ASSET_VERSION}`;
+// كل مؤشر صفحة أو فلتر عنوان جديد، فيبقى فقط أحدث هذا العدد من الردود
+const API_CACHE_MAX_ENTRIES = 50;
 const urlsToCache = [
   '/',
-  '/static/css/style.css',
-  '/static/js/app.js',
-  '/static/manifest.json',
+  ...PRECACHE_ASSETS,
   '/offline.html'
 ];
 
@@ -28,7 +35,7 @@ self.addEventListener('activate', event => {
     caches.keys().then(cacheNames => {
       return Promise.all(
         cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
+          if (cacheName !== CACHE_NAME && cacheName !== API_CACHE_NAME) {
             console.log('حذف الذاكرة المؤقتة القديمة:', cacheName);
             return caches.delete(cacheName);
           }
@@ -39,6 +46,38 @@ self.addEventListener('activate', event => {
   self.clients.claim();
 });
 
+// حذف أقدم المدخلات (المفاتيح بترتيب الإضافة) حتى لا يزيد عددها عن الحد
+function trimCache(cache, maxEntries) {
+  return cache.keys().then(keys =>
+    Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)))
+  );
+}
+
+// واجهة JSON: عرض النسخة المخزنة فوراً ثم تحديثها من الشبكة في الخلفية.
+// الخادم يرد بـ 304 إذا لم تتغير الوظائف، فيكون التحقق شبه مجاني
+function staleWhileRevalidate(event) {
+  return caches.open(API_CACHE_NAME).then(cache =>
+    cache.match(event.request).then(cached => {
+      const network = fetch(event.request)
+        .then(response => {
+          if (response && response.status === 200) {
+            event.waitUntil(
+              cache.put(event.request, response.clone())
+                .then(() => trimCache(cache, API_CACHE_MAX_ENTRIES))
+            );
+          }
+          return response;
+        });
+
+      if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+      }
+      return network;
+    })
+  );
+}
+
 // اعتراض الطلبات
 self.addEventListener('fetch', event => {
   // تجاهل الطلبات غير HTTP
@@ -46,37 +85,54 @@ self.addEventListener('fetch', event => {
     return;
   }
 
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => {
-        // إذا كانت الموارد في الذاكرة المؤقتة، أرجعها
-        if (response) {
-          return response;
-        }
+  const url = new URL(event.request.url);
+  if (event.request.method === 'GET' && url.pathname.startsWith('/api/v1/')) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
 
-        // وإلا، حاول جلبها من الشبكة
-        return fetch(event.request)
-          .then(response => {
-            // تحقق من أن الاستجابة صحيحة
-            if (!response || response.status !== 200 || response.type === 'error') {
-              return response;
-            }
+  // الملفات الثابتة تحمل بصمة المحتوى، فالنسخة المخزنة صحيحة دائماً
+  if (event.request.method === 'GET' && url.pathname.startsWith('/static/')) {
+    event.respondWith(cacheFirst(event));
+    return;
+  }
 
-            // انسخ الاستجابة
-            const responseToCache = response.clone();
+  // الصفحات من الشبكة دائماً، والنسخة المخزنة عند انقطاع الاتصال فقط
+  if (event.request.mode === 'navigate') {
+    event.respondWith(
+      fetch(event.request).catch(() =>
+        caches.match(event.request).then(response => response || caches.match('/offline.html'))
+      )
+    );
+  }
+});
 
-            // أضفها إلى الذاكرة المؤقتة
-            caches.open(CACHE_NAME)
-              .then(cache => {
-                cache.put(event.request, responseToCache);
-              });
+function cacheFirst(event) {
+  return caches.match(event.request)
+    .then(response => {
+      // إذا كانت الموارد في الذاكرة المؤقتة، أرجعها
+      if (response) {
+        return response;
+      }
 
+      // وإلا، حاول جلبها من الشبكة
+      return fetch(event.request)
+        .then(response => {
+          // تحقق من أن الاستجابة صحيحة
+          if (!response || response.status !== 200 || response.type === 'error') {
             return response;
-          })
-          .catch(() => {
-            // في حالة الفشل، عد إلى صفحة offline
-            return caches.match('/offline.html');
-          });
-      })
-  );
-});
+          }
+
+          // انسخ الاستجابة
+          const responseToCache = response.clone();
+
+          // أضفها إلى الذاكرة المؤقتة
+          caches.open(CACHE_NAME)
+            .then(cache => {
+              cache.put(event.request, responseToCache);
+            });
+
+          return response;
+        });
+    });
+}
@@ -0,0 +1,84 @@
+import mailbox
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+# ==================== خادم SMTP محلي للتطوير ====================
+# يستقبل الرسائل ويطبعها (ويحفظها في ملف mbox إن طُلب) دون إرسال أي بريد فعلي
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost SMTP stub')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[-1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.server.deliver(recipients, self._read_data())
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                recipients = [] if verb == 'RSET' else recipients
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line.rstrip(b'\r\n') == b'.':
+                return b''.join(lines)
+            # إزالة النقطة المضاعفة في بداية السطر (RFC 5321)
+            lines.append(line[1:] if line.startswith(b'..') else line)
+
+
+class SmtpStub(socketserver.ThreadingTCPServer):
+    """خادم SMTP بسيط؛ messages قائمة (المستلمون، الرسالة) لكل ما استقبله"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 1025), mbox_path=None, echo=True):
+        super().__init__(address, _Handler)
+        self.messages = []
+        self.mbox_path = mbox_path
+        self.echo = echo
+        self._lock = threading.Lock()
+
+    def deliver(self, recipients, data):
+        message = message_from_bytes(data, policy=policy.default)
+        with self._lock:
+            self.messages.append((recipients, message))
+            if self.mbox_path:
+                box = mailbox.mbox(self.mbox_path)
+                box.add(data)
+                box.close()
+        if self.echo:
+            print(f"✉ إلى {', '.join(recipients)}: {message['Subject']}")
+            print(message.get_content().rstrip())
+            print()
+
+    def start(self):
+        """التشغيل في خيط خلفي (للسكربتات)؛ يُوقف بـ shutdown()"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from sqlalchemy import delete, event, select, text
+
+from models import db, Application, ArchivedApplication, CvBlob
+
+# ==================== تخزين السير الذاتية حسب المحتوى ====================
+
+CHUNK_SIZE = 64 * 1024
+
+_BLOB_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+
+def is_blob_name(name):
+    return bool(name and _BLOB_NAME.match(name))
+
+
+def blob_path(upload_folder, name):
+    """المسار على القرص: uploads/ab/cd/<sha256>.<ext>
+
+    الملفات القديمة (المحفوظة باسم الوقت + اسم الملف) تبقى مباشرة في uploads/
+    """
+    if is_blob_name(name):
+        return os.path.join(upload_folder, name[:2], name[2:4], name)
+    return os.path.join(upload_folder, name)
+
+
+def save_cv(upload_folder, file, extension):
+    """حفظ الملف المرفوع مرة واحدة فقط حسب بصمته وإرجاع اسمه
+
+    تُحسب البصمة على دفعات من الملف المؤقت الذي أنشأه Werkzeug، ولا يُكتب
+    على القرص إلا إذا كان المحتوى جديداً.
+    """
+    stream = file.stream
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+
+    name = f'{digest.hexdigest()}.{extension.lower()}'
+    path = blob_path(upload_folder, name)
+
+    try:
+        # تحديث وقت التعديل حتى لا يحذفه جامع المهملات قبل حفظ الطلب
+        os.utime(path)
+        return name
+    except FileNotFoundError:
+        # غير موجود، أو نقله جامع المهملات للتو: يُكتب من جديد
+        pass
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    stream.seek(0)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            shutil.copyfileobj(stream, out, CHUNK_SIZE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return name
+
+
+# ==================== عدد المراجع ====================
+
+def _change_refcounts(conn, names, delta):
+    params = [{'name': name, 'delta': delta} for name in names if is_blob_name(name)]
+    if not params:
+        return
+    conn.execute(text(
+        "INSERT INTO cv_blobs (name, refcount, created_at) VALUES (:name, :delta, CURRENT_TIMESTAMP) "
+        "ON CONFLICT (name) DO UPDATE SET refcount = cv_blobs.refcount + :delta"
+    ), params)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_cv_references(session, flush_context):
+    added = [a.cv_filename for a in session.new if isinstance(a, Application) and a.cv_filename]
+    removed = [a.cv_filename for a in session.deleted if isinstance(a, Application) and a.cv_filename]
+    if added or removed:
+        conn = session.connection()
+        _change_refcounts(conn, added, 1)
+        _change_refcounts(conn, removed, -1)
+
+
+def recount_references():
+    """إعادة حساب عدد المراجع من جدولي الطلبات والأرشيف (للإصلاح)"""
+    referenced = Counter()
+    for model in (Application, ArchivedApplication):
+        referenced.update(dict(
+            db.session.query(model.cv_filename, db.func.count())
+            .filter(model.cv_filename.isnot(None))
+            .group_by(model.cv_filename)
+        ))
+    db.session.query(CvBlob).update({CvBlob.refcount: 0})
+    for name, count in referenced.items():
+        if is_blob_name(name):
+            db.session.execute(text(
+                "INSERT INTO cv_blobs (name, refcount, created_at) VALUES (:name, :count, CURRENT_TIMESTAMP) "
+                "ON CONFLICT (name) DO UPDATE SET refcount = :count"
+            ), {'name': name, 'count': count})
+    db.session.commit()
+
+
+def _remove_unreferenced(path, filename, cutoff):
+    """حذف ملف واحد إذا لم يعد له مراجع، ويعيد True إذا حُذف
+
+    صف cv_blobs يُحذف بشرط refcount = 0 ويبقى مقفلاً حتى نهاية المعاملة، فلا يُحسب
+    عليه مرجع جديد قبل أن نقرر. والملف يُنقل أولاً إلى اسم مؤقت ثم يُفحص وقت تعديله:
+    إذا لمسه save_cv في الأثناء (رفع نفس المحتوى) يُعاد مكانه ولا يُحذف.
+    """
+    deleted = db.session.execute(
+        delete(CvBlob).where(CvBlob.name == filename, CvBlob.refcount <= 0)
+    ).rowcount
+    if not deleted and db.session.execute(
+        select(CvBlob.name).where(CvBlob.name == filename).with_for_update()
+    ).first() is not None:
+        db.session.rollback()
+        return False
+
+    tombstone = path + '.gc'
+    try:
+        os.replace(path, tombstone)
+    except FileNotFoundError:
+        db.session.rollback()
+        return False
+    if os.path.getmtime(tombstone) > cutoff:
+        os.replace(tombstone, path)
+        db.session.rollback()
+        return False
+    os.unlink(tombstone)
+    db.session.commit()
+    return True
+
+
+def collect_garbage(upload_folder, grace_seconds=3600):
+    """حذف الملفات التي لا يشير إليها أي طلب، ويعيد عدد الملفات المحذوفة
+
+    لا يُحذف ملف عُدِّل خلال فترة السماح حتى لا نسبق طلباً لم يُحفظ بعد.
+    """
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for directory, _, files in os.walk(upload_folder):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            # بقايا كتابة أو حذف لم يكتمل (توقف العملية في المنتصف)
+            if filename.endswith(('.part', '.gc')):
+                os.unlink(path)
+                continue
+            if not is_blob_name(filename) or blob_path(upload_folder, filename) != path:
+                continue
+
+            blob = db.session.get(CvBlob, filename)
+            if blob is not None and blob.refcount >= 1:
+                continue
+            if _remove_unreferenced(path, filename, cutoff):
+                removed += 1
+    return removed
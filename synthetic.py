@@ -0,0 +1,193 @@
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import func, insert, select, text
+
+from analytics import count_new_applications
+from cache import PUBLISHED_JOBS, bump_version
+from models import db, Company, Job, JobSeeker, Application, ArchivedJob, ArchivedApplication
+from passwords import hash_password
+from search import index_jobs
+
+# ==================== بيانات عربية تجريبية بأحجام كبيرة ====================
+
+CITIES = ['نجران', 'الرياض', 'جدة', 'مكة المكرمة', 'المدينة المنورة', 'الدمام', 'الخبر',
+          'أبها', 'خميس مشيط', 'جازان', 'تبوك', 'حائل', 'بريدة', 'الطائف', 'شرورة']
+FIRST_NAMES = ['محمد', 'أحمد', 'عبدالله', 'فهد', 'خالد', 'سعد', 'علي', 'ناصر', 'سلطان', 'فيصل',
+               'نورة', 'سارة', 'فاطمة', 'مريم', 'ريم', 'هيا', 'لطيفة', 'أمل', 'منى', 'عبير']
+FAMILY_NAMES = ['آل مانع', 'اليامي', 'القحطاني', 'الشهري', 'العتيبي', 'الدوسري', 'الحارثي',
+                'آل سالم', 'الغامدي', 'الزهراني', 'المالكي', 'العنزي', 'الشمري', 'آل منصور']
+COMPANY_WORDS = ['التقنية', 'الحلول', 'التطوير', 'الاستشارات', 'الخدمات', 'الأنظمة', 'الإنشاءات',
+                 'التجارة', 'الطاقة', 'الرعاية', 'التعليم', 'اللوجستية']
+TITLES = {
+    'IT': ['مطور بايثون', 'مهندس برمجيات', 'محلل نظم', 'مهندس شبكات', 'مطور واجهات أمامية',
+           'أخصائي أمن معلومات', 'مسؤول قواعد بيانات', 'مهندس بيانات'],
+    'Accounting': ['محاسب', 'محاسب عام', 'مدقق حسابات', 'محلل مالي', 'أمين صندوق'],
+    'HR': ['أخصائي موارد بشرية', 'مسؤول توظيف', 'أخصائي رواتب', 'مدير موارد بشرية'],
+    'Sales': ['مندوب مبيعات', 'مدير حسابات', 'أخصائي مبيعات', 'مشرف مبيعات'],
+    'Marketing': ['أخصائي تسويق رقمي', 'مسؤول علاقات عامة', 'كاتب محتوى', 'مدير تسويق'],
+    'Design': ['مصمم جرافيك', 'مصمم واجهات مستخدم', 'مصمم موشن جرافيك'],
+    'Other': ['سكرتير تنفيذي', 'موظف استقبال', 'منسق مشاريع', 'مساعد إداري'],
+}
+SKILLS = ['العمل ضمن فريق', 'مهارات تواصل ممتازة', 'إجادة اللغة الإنجليزية', 'Python', 'Flask',
+          'SQL', 'Excel', 'الدقة والتنظيم', 'خبرة لا تقل عن سنتين', 'شهادة بكالوريوس',
+          'رخصة قيادة سارية', 'الإقامة في المنطقة', 'إدارة الوقت', 'حل المشكلات']
+JOB_TYPES = ['Full-time', 'Full-time', 'Full-time', 'Part-time', 'Internship']
+JOB_STATUSES = ['Published'] * 16 + ['Pending'] * 2 + ['Hidden', 'Rejected']
+APPLICATION_STATUSES = ['Pending'] * 7 + ['Accepted'] + ['Rejected'] * 2
+
+# الفارق الزمني بين وظيفتين متتاليتين؛ الأحدث رقماً أحدث تاريخاً
+JOB_SPACING = timedelta(minutes=7)
+
+
+def _companies(rng, start_id, count, password):
+    for company_id in range(start_id, start_id + count):
+        yield {
+            'company_id': company_id,
+            'company_name': f'شركة {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {company_id}',
+            'email': f'company{company_id}@example.test',
+            'password': password,
+            'phone': f'+9665{rng.randrange(10**8):08d}',
+            'city': rng.choice(CITIES),
+            'description': f'شركة رائدة في مجال {rng.choice(COMPANY_WORDS)} في منطقة {rng.choice(CITIES)}',
+            'status': 'Approved' if rng.random() < 0.9 else 'Pending',
+            'created_at': datetime.utcnow(),
+        }
+
+
+def _job_posted_at(now, last_id, job_id):
+    return now - JOB_SPACING * (last_id - job_id)
+
+
+def _jobs(rng, start_id, count, company_ids, now):
+    last_id = start_id + count - 1
+    for job_id in range(start_id, last_id + 1):
+        category = rng.choice(list(TITLES))
+        title = rng.choice(TITLES[category])
+        city = rng.choice(CITIES)
+        skills = rng.sample(SKILLS, 4)
+        yield {
+            'job_id': job_id,
+            'company_id': rng.randint(*company_ids),
+            'category_name': category,
+            'title': title,
+            'description': f'نبحث عن {title} للانضمام إلى فريقنا في {city}، '
+                           f'للعمل على مشاريع متنوعة مع {skills[0]}.',
+            'city': city,
+            'job_type': rng.choice(JOB_TYPES),
+            'salary': f'{rng.randrange(4, 20) * 1000} ريال' if rng.random() < 0.7 else None,
+            'requirements': '، '.join(skills),
+            'status': rng.choice(JOB_STATUSES),
+            'posted_at': _job_posted_at(now, last_id, job_id),
+            'revision': 0,
+        }
+
+
+def _seekers(rng, start_id, count, password):
+    for seeker_id in range(start_id, start_id + count):
+        yield {
+            'seeker_id': seeker_id,
+            'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(FAMILY_NAMES)}',
+            'email': f'seeker{seeker_id}@example.test',
+            'password': password,
+            'phone': f'05{rng.randrange(10**8):08d}',
+            'city': rng.choice(CITIES),
+            'created_at': datetime.utcnow(),
+        }
+
+
+def _applications(rng, seeker_ids, job_ids, count, now):
+    """توزيع الطلبات على الباحثين بالتساوي، ولكل باحث وظائف مختلفة (بلا تكرار)"""
+    first_seeker, last_seeker = seeker_ids
+    first_job, last_job = job_ids
+    seekers = last_seeker - first_seeker + 1
+    jobs = range(first_job, last_job + 1)
+    per_seeker, extra = divmod(count, seekers)
+
+    for offset in range(seekers):
+        wanted = min(per_seeker + (1 if offset < extra else 0), len(jobs))
+        for job_id in rng.sample(jobs, wanted):
+            posted_at = _job_posted_at(now, last_job, job_id)
+            yield {
+                'job_id': job_id,
+                'seeker_id': first_seeker + offset,
+                'cover_letter': 'أرغب في الانضمام إلى فريقكم، ولدي الخبرة المطلوبة.',
+                'cv_filename': None,
+                'status': rng.choice(APPLICATION_STATUSES),
+                'applied_at': posted_at + timedelta(minutes=rng.randrange(1, 60 * 24 * 14)),
+            }
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _next_id(conn, *columns):
+    # معرّفات الأرشيف محجوزة أيضاً: الاستعادة تعيد الصف بنفس معرّفه
+    return max(conn.execute(select(func.max(column))).scalar() or 0 for column in columns) + 1
+
+
+def _sync_sequence(conn, table, column, archive=None):
+    # المعرّفات أُدرجت صراحة، فيجب تقديم تسلسل PostgreSQL بعدها دون النزول تحت معرّفات الأرشيف
+    if conn.dialect.name == 'postgresql':
+        highest = f"(SELECT MAX({column}) FROM {table})"
+        if archive:
+            highest = f"GREATEST({highest}, (SELECT MAX({column}) FROM {archive}))"
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), {highest})"
+        ))
+
+
+def generate(engine, companies=100, jobs=1000, seekers=10000, applications=50000,
+             batch_size=5000, seed=42, progress=None):
+    """إضافة بيانات تجريبية على دفعات دون تحميلها في الذاكرة
+
+    المعرّفات متتالية بعد أكبر معرّف موجود، فتبقى البيانات الحالية كما هي.
+    كل الحسابات بكلمة المرور 123456 (تُحسب مرة واحدة لأن تجزئتها لكل صف بطيئة جداً).
+    """
+    rng = random.Random(seed)
+    password = hash_password('123456')
+    now = datetime.utcnow()
+    report = progress or (lambda table, done: None)
+
+    with engine.begin() as conn:
+        company_start = _next_id(conn, Company.company_id)
+        job_start = _next_id(conn, Job.job_id, ArchivedJob.job_id)
+        seeker_start = _next_id(conn, JobSeeker.seeker_id)
+
+    def load(table, rows, after_batch=None):
+        done = 0
+        for batch in _batches(rows, batch_size):
+            with engine.begin() as conn:
+                conn.execute(insert(table), batch)
+                if after_batch:
+                    after_batch(conn, batch)
+            done += len(batch)
+            report(table.name, done)
+
+    def index_batch(conn, batch):
+        index_jobs(conn, [(r['job_id'], r['title'], r['description'], r['requirements']) for r in batch])
+
+    load(Company.__table__, _companies(rng, company_start, companies, password))
+    company_ids = (company_start, company_start + companies - 1)
+    load(Job.__table__, _jobs(rng, job_start, jobs, company_ids, now), index_batch)
+    load(JobSeeker.__table__, _seekers(rng, seeker_start, seekers, password))
+    if seekers and jobs:
+        load(Application.__table__, _applications(
+            rng, (seeker_start, seeker_start + seekers - 1),
+            (job_start, job_start + jobs - 1), applications, now), count_new_applications)
+
+    with engine.begin() as conn:
+        for table, column, archive in (
+                ('companies', 'company_id', None),
+                ('jobs', 'job_id', ArchivedJob.__tablename__),
+                ('job_seekers', 'seeker_id', None),
+                ('applications', 'application_id', ArchivedApplication.__tablename__)):
+            _sync_sequence(conn, table, column, archive)
+        # الإدراج المجمع لا يمر على أحداث الجلسة
+        bump_version(conn, PUBLISHED_JOBS)
@@ -0,0 +1,42 @@
+from app import create_app
+from migrations import upgrade
+from models import db, JobSeeker
+
+
+def _app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/events.db',
+        'EVENTS_POLL_INTERVAL': 0.01,
+        'EVENTS_HEARTBEAT_SECONDS': 0,
+        'EVENTS_MAX_SECONDS': 5,
+    })
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+        seeker = JobSeeker(full_name='باحث', email='seeker@example.com', phone='0500000000', city='نجران')
+        seeker.set_password('123456')
+        db.session.add(seeker)
+        db.session.commit()
+        seeker_id = seeker.seeker_id
+    return app, seeker_id
+
+
+def test_stream_does_not_hold_a_connection(tmp_path):
+    """البث المفتوح لا يحجز اتصالاً من المجمع بين القراءات، حتى عند البدء بلا Last-Event-ID"""
+    app, seeker_id = _app(tmp_path)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_type'] = 'seeker'
+        session['user_id'] = seeker_id
+
+    response = client.get('/events/stream', buffered=False)
+    try:
+        assert response.status_code == 200
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b'retry:')
+        # الرسالة التالية بعد أول قراءة من القاعدة
+        assert next(chunks) == b': keepalive\n\n'
+        with app.app_context():
+            assert db.engine.pool.checkedout() == 0
+    finally:
+        response.close()